@@ -1,6 +1,13 @@
-from flask import Flask, jsonify, request, send_from_directory
-from flask_cors import CORS
+from quart import Quart, Response, jsonify, request, send_from_directory
+from quart.json.provider import DefaultJSONProvider
+from quart_cors import cors
+import asyncio
+import functools
+import gzip
+import hashlib
 import json
+import orjson
+import pandas as pd
 from dss_algorithm import VineyardDSS
 from spatial_interpolation import SpatialInterpolator
 from data_generator import VineyardDataGenerator
@@ -8,42 +15,129 @@ from heatmap_generator import HeatmapGenerator
 from data_mining import VineyardDataMiner
 import os
 
-app = Flask(__name__, static_folder='.')
-CORS(app)
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson so every jsonify call uses it"""
+    def dumps(self, obj, **kwargs):
+        # keep the provider's default hook so datetime/UUID/dataclass payloads
+        # fall back instead of raising
+        return orjson.dumps(obj, default=self.default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+app = Quart(__name__, static_folder='.')
+app = cors(app)
+app.json = OrjsonProvider(app)
+
+# shared instances; they only hold parsed config so construction cost is paid once
+DSS = VineyardDSS()
+MINER = VineyardDataMiner()
+HEATMAP = HeatmapGenerator()
+INTERP = SpatialInterpolator()
+
+@functools.cache
+def _load_config():
+    with open('vineyard_config.json', 'r') as f:
+        return json.load(f)
+
+# computed-result cache keyed on (endpoint params, sensor csv mtime), capped
+# so stale-mtime entries cannot accumulate over a long-lived server
+_result_cache = {}
+_RESULT_CACHE_MAX = 256
+
+def _cache_put(key, value):
+    if len(_result_cache) >= _RESULT_CACHE_MAX:
+        _result_cache.clear()
+    _result_cache[key] = value
+
+def _json_response(payload):
+    # bulk frames serialize much faster through orjson than jsonify;
+    # default=str covers pd.Timestamp, which OPT_SERIALIZE_NUMPY does not
+    return Response(orjson.dumps(payload, default=str, option=orjson.OPT_SERIALIZE_NUMPY),
+                    mimetype='application/json')
+
+def _etag_for(*parts):
+    return hashlib.blake2b('-'.join(str(p) for p in parts).encode(), digest_size=12).hexdigest()
+
+def _data_mtime():
+    try:
+        return os.path.getmtime('sensor_data.csv')
+    except OSError:
+        return None
+
+# sensor csv cache keyed on file mtime, pre-grouped into records per date
+_sensor_cache = {'mtime': None, 'by_date': None}
+
+@functools.lru_cache(maxsize=8)
+def _cached_sensor_data(days_back, mtime):
+    # mtime is part of the key so the cache rolls over when the csv changes
+    return MINER.load_sensor_data(days_back=days_back)
+
+def _load_sensor_by_date():
+    mtime = os.path.getmtime('sensor_data.csv')
+    if _sensor_cache['mtime'] != mtime:
+        try:
+            df = pd.read_csv('sensor_data.csv', engine='pyarrow')
+        except (ImportError, ValueError):  # pyarrow not installed
+            df = pd.read_csv('sensor_data.csv')
+        _sensor_cache['mtime'] = mtime
+        _sensor_cache['by_date'] = {d: g.to_dict('records') for d, g in df.groupby('date', sort=False)}
+    return _sensor_cache['by_date']
+
+@app.after_request
+async def compress_response(response):
+    # gzip large json payloads when the client accepts it
+    if ((response.content_type or '').startswith('application/json')
+            and 'gzip' in request.headers.get('Accept-Encoding', '')
+            and 'Content-Encoding' not in response.headers):
+        body = await response.get_data()
+        if len(body) > 1024:
+            await response.set_data(gzip.compress(body, 5))
+            response.headers['Content-Encoding'] = 'gzip'
+            response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 @app.route('/')
-def index():
-    return send_from_directory('.', 'index.html')
+async def index():
+    return await send_from_directory('.', 'index.html')
 
 @app.route('/api/config')
-def get_config():
-    with open('vineyard_config.json', 'r') as f:
-        return jsonify(json.load(f))
+async def get_config():
+    return jsonify(_load_config())
 
 @app.route('/api/heatmap/<date>')
-def get_heatmap(date):
-    interpolator = SpatialInterpolator()
-    heatmaps = interpolator.generate_all_heatmaps(date)
-    return jsonify(heatmaps)
+async def get_heatmap(date):
+    etag = _etag_for('heatmap', date, _data_mtime())
+    if etag in request.if_none_match:
+        return '', 304
+
+    key = ('heatmap', date, _data_mtime())
+    if key not in _result_cache:
+        # run the interpolation off the event loop
+        _cache_put(key, await asyncio.to_thread(INTERP.generate_all_heatmaps, date))
+    resp = jsonify(_result_cache[key])
+    resp.set_etag(etag)
+    return resp
 
 @app.route('/api/prescription', methods=['POST'])
-def calculate_prescription():
-    data = request.json
+async def calculate_prescription():
+    data = await request.get_json()
     target_date = data.get('target_date')
-    
-    dss = VineyardDSS()
-    prescription = dss.generate_prescription(target_date)
-    return jsonify(prescription)
+
+    key = ('prescription', target_date, _data_mtime())
+    if key not in _result_cache:
+        _cache_put(key, await asyncio.to_thread(DSS.generate_prescription, target_date))
+    return jsonify(_result_cache[key])
 
 @app.route('/api/prescription/water', methods=['POST'])
-def calculate_water_prescription():
-    data = request.json
+async def calculate_water_prescription():
+    data = await request.get_json()
     target_date = data.get('target_date')
-    
-    dss = VineyardDSS()
-    water_needs, sensor_water_needs = dss.calculate_water_prescription(target_date)
-    cost = dss.calculate_water_only_cost(water_needs)
-    
+
+    water_needs, sensor_water_needs = await asyncio.to_thread(DSS.calculate_water_prescription, target_date)
+    cost = DSS.calculate_water_only_cost(water_needs)
+
     return jsonify({
         'target_date': target_date,
         'water_prescription': water_needs,
@@ -52,14 +146,13 @@ def calculate_water_prescription():
     })
 
 @app.route('/api/prescription/fertilizer', methods=['POST'])
-def calculate_fertilizer_prescription():
-    data = request.json
+async def calculate_fertilizer_prescription():
+    data = await request.get_json()
     target_date = data.get('target_date')
-    
-    dss = VineyardDSS()
-    fertilizer_needs, sensor_fertilizer_needs = dss.calculate_fertilizer_prescription(target_date)
-    cost = dss.calculate_fertilizer_only_cost(fertilizer_needs)
-    
+
+    fertilizer_needs, sensor_fertilizer_needs = await asyncio.to_thread(DSS.calculate_fertilizer_prescription, target_date)
+    cost = DSS.calculate_fertilizer_only_cost(fertilizer_needs)
+
     return jsonify({
         'target_date': target_date,
         'fertilizer_prescription': fertilizer_needs,
@@ -68,76 +161,81 @@ def calculate_fertilizer_prescription():
     })
 
 @app.route('/api/generate-data', methods=['POST'])
-def generate_data():
+async def generate_data():
     gen = VineyardDataGenerator()
-    gen.generate_all_data()
+    await asyncio.to_thread(gen.generate_all_data)
+    _sensor_cache['mtime'] = None  # force reload on next request
+    _result_cache.clear()
     return jsonify({'status': 'success', 'message': 'Data generated'})
 
 @app.route('/api/heatmap-image/<date>/<data_type>')
-def get_heatmap_image(date, data_type):
-    gen = HeatmapGenerator()
-    heatmap = gen.generate_contour_heatmap(date, data_type)
+async def get_heatmap_image(date, data_type):
+    etag = _etag_for('heatmap-image', date, data_type, _data_mtime())
+    if etag in request.if_none_match:
+        return '', 304
+
+    key = ('heatmap-image', date, data_type, _data_mtime())
+    if key not in _result_cache:
+        _cache_put(key, await asyncio.to_thread(HEATMAP.generate_contour_heatmap, date, data_type))
+    heatmap = _result_cache[key]
     if heatmap:
-        return jsonify(heatmap)
+        resp = jsonify(heatmap)
+        resp.set_etag(etag)
+        return resp
     return jsonify({'error': 'Failed to generate heatmap'}), 404
 
 @app.route('/api/prescription-heatmap', methods=['POST'])
-def get_prescription_heatmap():
-    data = request.json
+async def get_prescription_heatmap():
+    data = await request.get_json()
     sensor_prescription_data = data.get('sensor_prescription_data')
     prescription_type = data.get('prescription_type', 'water')
-    
-    gen = HeatmapGenerator()
-    heatmap = gen.generate_sensor_prescription_heatmap(sensor_prescription_data, prescription_type)
+
+    heatmap = await asyncio.to_thread(HEATMAP.generate_sensor_prescription_heatmap, sensor_prescription_data, prescription_type)
     return jsonify(heatmap)
 
 @app.route('/api/sensor-data/<date>')
-def get_sensor_data(date):
-    import pandas as pd
+async def get_sensor_data(date):
     try:
-        sensor_data = pd.read_csv('sensor_data.csv')
-        date_data = sensor_data[sensor_data['date'] == date]
-        return jsonify(date_data.to_dict('records'))
+        by_date = await asyncio.to_thread(_load_sensor_by_date)
+        return Response(orjson.dumps(by_date.get(date, [])), mimetype='application/json')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/mining/outliers', methods=['POST'])
-def detect_outliers():
-    data = request.json
+async def detect_outliers():
+    data = await request.get_json()
     days_back = data.get('days_back', 30)
     method = data.get('method', 'statistical')  # 'statistical' or 'isolation_forest'
-    
-    miner = VineyardDataMiner()
-    sensor_data = miner.load_sensor_data(days_back=days_back)
-    
+
+    sensor_data = await asyncio.to_thread(_cached_sensor_data, days_back, _data_mtime())
+
     if method == 'statistical':
-        outliers = miner.detect_outliers_statistical(sensor_data)
+        outliers = await asyncio.to_thread(MINER.detect_outliers_statistical, sensor_data)
     else:
-        outliers = miner.detect_outliers_isolation_forest(sensor_data)
-    
-    return jsonify({
+        outliers = await asyncio.to_thread(MINER.detect_outliers_isolation_forest, sensor_data)
+
+    return _json_response({
         'outliers_count': len(outliers),
         'outliers': outliers.to_dict('records') if len(outliers) > 0 else [],
         'affected_sensors': outliers['sensor_id'].nunique() if len(outliers) > 0 else 0
     })
 
 @app.route('/api/mining/clusters', methods=['POST'])
-def cluster_sensors():
-    data = request.json
+async def cluster_sensors():
+    data = await request.get_json()
     days_back = data.get('days_back', 30)
     cluster_type = data.get('type', 'spatial')  # 'spatial' or 'temporal'
     n_clusters = data.get('n_clusters', None)
-    
-    miner = VineyardDataMiner()
-    sensor_data = miner.load_sensor_data(days_back=days_back)
-    
+
+    sensor_data = await asyncio.to_thread(_cached_sensor_data, days_back, _data_mtime())
+
     if cluster_type == 'spatial':
-        clusters = miner.cluster_sensors_spatial(sensor_data, n_clusters=n_clusters)
+        clusters = await asyncio.to_thread(MINER.cluster_sensors_spatial, sensor_data, n_clusters)
     else:
-        clusters = miner.cluster_temporal_patterns(sensor_data, n_clusters=n_clusters or 4)
-    
+        clusters = await asyncio.to_thread(MINER.cluster_temporal_patterns, sensor_data, n_clusters or 4)
+
     if clusters is not None:
-        return jsonify({
+        return _json_response({
             'clusters': clusters.to_dict('records'),
             'cluster_count': clusters.iloc[:, 1].nunique(),  # second column is cluster id
             'success': True
@@ -146,16 +244,15 @@ def cluster_sensors():
         return jsonify({'success': False, 'message': 'insufficient data for clustering'})
 
 @app.route('/api/mining/anomalies', methods=['POST'])
-def detect_anomalies():
-    data = request.json
+async def detect_anomalies():
+    data = await request.get_json()
     days_back = data.get('days_back', 30)
-    
-    miner = VineyardDataMiner()
-    sensor_data = miner.load_sensor_data(days_back=days_back)
-    
-    zone_anomalies = miner.find_anomalous_zones(sensor_data)
-    sensor_drift = miner.detect_sensor_drift(sensor_data)
-    
+
+    sensor_data = await asyncio.to_thread(_cached_sensor_data, days_back, _data_mtime())
+
+    zone_anomalies = await asyncio.to_thread(MINER.find_anomalous_zones, sensor_data)
+    sensor_drift = await asyncio.to_thread(MINER.detect_sensor_drift, sensor_data)
+
     return jsonify({
         'anomalous_zones': zone_anomalies['anomalous_zones'],
         'zone_scores': zone_anomalies['anomaly_scores'],
@@ -164,21 +261,20 @@ def detect_anomalies():
     })
 
 @app.route('/api/mining/clean-data', methods=['POST'])
-def clean_data():
-    data = request.json
+async def clean_data():
+    data = await request.get_json()
     days_back = data.get('days_back', 30)
     method = data.get('method', 'cap')  # 'remove', 'cap', 'interpolate'
-    
-    miner = VineyardDataMiner()
-    sensor_data = miner.load_sensor_data(days_back=days_back)
-    
+
+    sensor_data = await asyncio.to_thread(_cached_sensor_data, days_back, _data_mtime())
+
     # detect outliers first
-    outliers = miner.detect_outliers_statistical(sensor_data)
-    
+    outliers = await asyncio.to_thread(MINER.detect_outliers_statistical, sensor_data)
+
     # clean data
-    cleaned_data = miner.clean_outliers(sensor_data, method=method, outlier_data=outliers)
-    
-    return jsonify({
+    cleaned_data = await asyncio.to_thread(MINER.clean_outliers, sensor_data, method, outliers)
+
+    return _json_response({
         'original_records': len(sensor_data),
         'cleaned_records': len(cleaned_data),
         'outliers_processed': len(outliers),
@@ -187,15 +283,14 @@ def clean_data():
     })
 
 @app.route('/api/mining/report', methods=['POST'])
-def generate_mining_report():
-    data = request.json
+async def generate_mining_report():
+    data = await request.get_json()
     days_back = data.get('days_back', 30)
-    
-    miner = VineyardDataMiner()
-    sensor_data = miner.load_sensor_data(days_back=days_back)
-    
+
+    sensor_data = await asyncio.to_thread(_cached_sensor_data, days_back, _data_mtime())
+
     try:
-        report = miner.generate_mining_report(sensor_data)
+        report = await asyncio.to_thread(MINER.generate_mining_report, sensor_data)
         return jsonify({
             'success': True,
             'report': report,
@@ -0,0 +1,59 @@
+import json
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+try:
+    import orjson
+
+    def dump_json(obj, path):
+        """Write obj as indented json; orjson handles numpy scalars natively"""
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, default=str,
+                                 option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+except ImportError:
+    def dump_json(obj, path):
+        """Write obj as indented json via the stdlib encoder"""
+        with open(path, 'w') as f:
+            json.dump(obj, f, indent=2, default=str)
+
+# measurements fit in float32 and ids repeat heavily; halving the bytes halves
+# the memory traffic of every downstream scan. dtype keys absent from a csv
+# are ignored, so one map covers all four files. dates stay strings because
+# the DSS filters on the string form.
+_DTYPES = {
+    'ground_moisture': 'float32', 'temperature': 'float32', 'humidity': 'float32',
+    'nutrient_N': 'float32', 'nutrient_P': 'float32', 'nutrient_K': 'float32',
+    'pH': 'float32', 'rainfall': 'float32', 'solar_radiation': 'float32',
+    'sensor_id': 'category', 'zone_id': 'category',
+}
+
+@lru_cache(maxsize=16)
+def _load_cached(path, mtime):
+    # keep a parquet sidecar next to the csv: typed, columnar, much faster to reload
+    parquet_path = path + '.parquet'
+    try:
+        if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= mtime:
+            return pd.read_parquet(parquet_path)
+        df = pd.read_csv(path, dtype=_DTYPES)
+        df.to_parquet(parquet_path)
+        return df
+    except (ImportError, OSError):  # no parquet engine available
+        return pd.read_csv(path, dtype=_DTYPES)
+
+def load_csv(path):
+    """Load a csv through an mtime-keyed cache; callers must treat the frame as read-only"""
+    return _load_cached(path, os.path.getmtime(path))
+
+@lru_cache(maxsize=16)
+def _date_groups(path, mtime):
+    # one groupby per file version replaces a boolean scan per request
+    df = _load_cached(path, mtime)
+    return {date: group for date, group in df.groupby('date', sort=False)}
+
+def load_day(path, date_str):
+    """Rows of a cached csv for one date; empty frame if the date is absent"""
+    mtime = os.path.getmtime(path)
+    groups = _date_groups(path, mtime)
+    return groups.get(date_str, _load_cached(path, mtime).iloc[0:0])
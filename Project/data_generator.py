@@ -1,12 +1,67 @@
 import json
 import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+try:
+    from numba import njit
+except ImportError:  # run the kernels as plain python when numba is absent
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        def wrap(func):
+            return func
+        return wrap
+
+@njit(cache=True)
+def _simulate_moisture(temp, hum, rain, solar, noise, start, retention, drainage_rate,
+                       bias, temp_offset, hum_offset, hist_days, fc_days):
+    """Run the day-to-day moisture recurrence as a tight native loop"""
+    n = temp.shape[0]
+    moisture = np.empty(n)
+    moisture[0] = start
+    for i in range(1, n):
+        sensor_temp = temp[i] + temp_offset
+        sensor_humidity = hum[i] + hum_offset
+
+        # moisture follows climate
+        # heat dries soil
+        # humidity slows loss
+        temp_effect = (sensor_temp - 20.0) * 0.15  # heat loss factor
+        humidity_effect = (sensor_humidity - 60.0) * 0.05  # humidity buffer factor
+
+        rain_effect = rain[i] * 0.3 * retention
+        evap_effect = temp_effect - humidity_effect + solar[i] * 0.01
+        drainage = moisture[i-1] * drainage_rate
+
+        # boost depletion in forecast
+        future_factor = 1.0 + (0.3 * (i - hist_days) / fc_days) if i >= hist_days else 1.0
+
+        value = moisture[i-1] + rain_effect - (evap_effect * future_factor) - drainage + bias * 0.02 + noise[i]
+        moisture[i] = min(max(value, 10.0), 40.0)
+    return moisture
+
+@njit(cache=True)
+def _simulate_nitrogen(noise, boost, start, depletion, bias, hist_days, fc_days):
+    """Run the day-to-day nitrogen recurrence as a tight native loop"""
+    n = noise.shape[0]
+    N = np.empty(n)
+    N[0] = start
+    for i in range(1, n):
+        # boost depletion for forecast
+        future_factor = 1.0 + (0.5 * (i - hist_days) / fc_days) if i >= hist_days else 1.0
+
+        # boost is zero outside the historical fertilization days
+        value = N[i-1] - (depletion * future_factor) + bias * 0.03 + noise[i] + boost[i]
+        N[i] = min(max(value, 10.0), 50.0)
+    return N
+
 class VineyardDataGenerator:
-    def __init__(self, config_path='vineyard_config.json'):
+    def __init__(self, config_path='vineyard_config.json', seed=None):
         with open(config_path, 'r') as f:
             self.config = json.load(f)
+        self.rng = np.random.default_rng(seed)  # single generator, reproducible when seeded
         # start two years back
         today = datetime.now()
         self.start_date = today - timedelta(days=730)
@@ -25,25 +80,34 @@ class VineyardDataGenerator:
         self.zone_microclimate = {}
         for zone_id in self.config['sensors'].keys():
             self.zone_microclimate[zone_id] = {
-                'temp_offset': np.random.uniform(-1.5, 1.5),  # zone temperature offset
-                'humidity_offset': np.random.uniform(-8, 8)     # zone humidity offset
+                'temp_offset': self.rng.uniform(-1.5, 1.5),  # zone temperature offset
+                'humidity_offset': self.rng.uniform(-8, 8)     # zone humidity offset
             }
     
-    def _get_seasonal_profile(self, month):
-        """Get seasonal climate profile for a given month"""
+    def _build_month_profile_table(self):
+        """Build a month-indexed [tmin, tmax, hmin, hmax] lookup table"""
+        table = np.zeros((13, 4))
         for season, profile in self.seasonal_profiles.items():
-            if month in profile['months']:
-                return profile
-        return self.seasonal_profiles['spring']  # default fallback
-        
+            for month in profile['months']:
+                table[month] = [*profile['temp_range'], *profile['humidity_range']]
+        return table
+
     def generate_all_data(self):
         dates = pd.date_range(self.start_date, periods=self.historical_days + self.forecast_days, freq='D')
         # drop time part
         dates = dates.date
-        weather_data = self._generate_weather(dates)
-        sensor_data = self._generate_sensor_data(dates, weather_data)
-        plant_data = self._generate_plant_data(dates, sensor_data)
-        intervention_data = self._generate_interventions(dates)
+        # weather and interventions are independent of the sensor pipeline,
+        # so run them in worker processes while sensors simulate here; each
+        # worker draws from its own spawned child stream, otherwise all three
+        # stages would replay the same pickled generator state
+        weather_rng, intervention_rng = self.rng.spawn(2)
+        with ProcessPoolExecutor(max_workers=2) as ex:
+            weather_future = ex.submit(self._generate_weather, dates, weather_rng)
+            intervention_future = ex.submit(self._generate_interventions, dates, intervention_rng)
+            weather_data = weather_future.result()
+            sensor_data = self._generate_sensor_data(dates, weather_data)
+            plant_data = self._generate_plant_data(dates, sensor_data)
+            intervention_data = intervention_future.result()
         
         weather_data.to_csv('weather_data.csv', index=False)
         sensor_data.to_csv('sensor_data.csv', index=False)
@@ -51,33 +115,26 @@ class VineyardDataGenerator:
         intervention_data.to_csv('intervention_data.csv', index=False)
         print(f"Generated data for {len(dates)} days")
         
-    def _generate_weather(self, dates):
+    def _generate_weather(self, dates, rng=None):
+        rng = rng if rng is not None else self.rng
         n = len(dates)
-        temp = np.zeros(n)
-        humidity = np.zeros(n)
-        
-        # apply seasonal profile
-        for i, date in enumerate(dates):
-            month = date.month
-            profile = self._get_seasonal_profile(month)
-            
-            # pick seasonal temp
-            temp_min, temp_max = profile['temp_range']
-            daily_temp_base = np.random.uniform(temp_min, temp_max)
-            temp[i] = daily_temp_base + np.random.normal(0, 2)  # add daily noise
-            
-            # pick seasonal humidity
-            hum_min, hum_max = profile['humidity_range']
-            daily_hum_base = np.random.uniform(hum_min, hum_max)
-            humidity[i] = daily_hum_base + np.random.normal(0, 5)
-        
+
+        # look up seasonal ranges for all days at once
+        month_to_profile = self._build_month_profile_table()
+        months = np.fromiter((d.month for d in dates), dtype=np.int8, count=n)
+        lo_t, hi_t, lo_h, hi_h = month_to_profile[months].T
+
+        # draw all days in one call
+        temp = rng.uniform(lo_t, hi_t) + rng.normal(0, 2, n)  # add daily noise
+        humidity = rng.uniform(lo_h, hi_h) + rng.normal(0, 5, n)
         humidity = np.clip(humidity, 30, 95)
-        
-        base_rain = 2 * (1 + np.sin(2 * np.pi * (np.arange(n) + 90) / 365))
-        rainfall = np.maximum(0, base_rain + np.random.exponential(1.5, n))
-        rainfall[np.random.rand(n) > 0.3] = 0  # enforce dry days
-        
-        solar = 200 + 150 * np.sin(2 * np.pi * np.arange(n) / 365) + np.random.normal(0, 20, n)
+
+        idx = np.arange(n)
+        base_rain = 2 * (1 + np.sin(2 * np.pi * (idx + 90) / 365))
+        rainfall = np.maximum(0, base_rain + rng.exponential(1.5, n))
+        rainfall[rng.random(n) > 0.3] = 0  # enforce dry days
+
+        solar = 200 + 150 * np.sin(2 * np.pi * idx / 365) + rng.normal(0, 20, n)
         solar = np.clip(solar, 50, 400)
         
         return pd.DataFrame({
@@ -86,11 +143,33 @@ class VineyardDataGenerator:
             'rainfall': rainfall,
             'humidity': humidity,
             'solar_radiation': solar,
-            'is_forecast': [i >= self.historical_days for i in range(n)]
+            'is_forecast': idx >= self.historical_days
         })
     
     def _generate_sensor_data(self, dates, weather_data):
-        rows = []
+        n = len(dates)
+
+        # materialize weather columns once for the recurrence kernels
+        temp_np = weather_data['temperature'].to_numpy()
+        hum_np = weather_data['humidity'].to_numpy()
+        rain_np = weather_data['rainfall'].to_numpy()
+        solar_np = weather_data['solar_radiation'].to_numpy()
+
+        # shared day index and yearly cycle, computed once for all sensors
+        idx = np.arange(n)
+        sin_year = np.sin(2 * np.pi * idx / 365)
+
+        # one array per column per sensor, concatenated once at the end
+        col_ids = []
+        col_zones = []
+        col_moisture = []
+        col_temp = []
+        col_humidity = []
+        col_pH = []
+        col_N = []
+        col_P = []
+        col_K = []
+
         for zone_id, sensors in self.config['sensors'].items():
             # fetch zone offset
             zone_temp_offset = self.zone_microclimate[zone_id]['temp_offset']
@@ -98,141 +177,135 @@ class VineyardDataGenerator:
             
             for sensor in sensors:
                 # give sensor unique state
-                moisture = np.zeros(len(dates))
-                moisture[0] = np.random.uniform(15, 35)  # wide start moisture
-                
+                moisture_start = self.rng.uniform(15, 35)  # wide start moisture
+
                 # add sensor variance
-                moisture_retention = np.random.uniform(0.6, 1.4)  # soil variance
-                drainage_rate = np.random.uniform(0.03, 0.20)     # drainage variance
-                base_moisture_offset = np.random.uniform(-5, 5)   # sensor moisture bias
-                
+                moisture_retention = self.rng.uniform(0.6, 1.4)  # soil variance
+                drainage_rate = self.rng.uniform(0.03, 0.20)     # drainage variance
+                base_moisture_offset = self.rng.uniform(-5, 5)   # sensor moisture bias
+
                 # sensor microclimate tweak
-                sensor_temp_micro = np.random.uniform(-0.5, 0.5)  # small temp tweak
-                sensor_humidity_micro = np.random.uniform(-3, 3)   # humidity tweak
-                
-                for i in range(1, len(dates)):
-                    # read base weather
-                    base_temp = weather_data.loc[i, 'temperature']
-                    base_humidity = weather_data.loc[i, 'humidity']
-                    
-                    # apply zone and sensor offsets
-                    sensor_temp = base_temp + zone_temp_offset + sensor_temp_micro
-                    sensor_humidity = base_humidity + zone_humidity_offset + sensor_humidity_micro
-                    
-                    # moisture follows climate
-                    # heat dries soil
-                    # humidity slows loss
-                    temp_effect = (sensor_temp - 20) * 0.15  # heat loss factor
-                    humidity_effect = (sensor_humidity - 60) * 0.05  # humidity buffer factor
-                    
-                    rain_effect = weather_data.loc[i, 'rainfall'] * 0.3 * moisture_retention
-                    evap_effect = temp_effect - humidity_effect + weather_data.loc[i, 'solar_radiation'] * 0.01
-                    drainage = moisture[i-1] * drainage_rate
-                    
-                    # boost depletion in forecast
-                    future_factor = 1.0 + (0.3 * (i - self.historical_days) / self.forecast_days) if i >= self.historical_days else 1.0
-                    
-                    moisture[i] = moisture[i-1] + rain_effect - (evap_effect * future_factor) - drainage + base_moisture_offset * 0.02 + np.random.normal(0, 1.5)
-                    moisture[i] = np.clip(moisture[i], 10, 40)
-                
+                sensor_temp_micro = self.rng.uniform(-0.5, 0.5)  # small temp tweak
+                sensor_humidity_micro = self.rng.uniform(-3, 3)   # humidity tweak
+
+                # one bulk gaussian draw per sensor, one row per noise stream
+                noise = self.rng.standard_normal((7, n))
+                moisture_noise = noise[0] * 1.5
+                pH_noise = noise[1] * 0.15
+                N_noise = noise[2] * 1.2
+                P_noise = noise[3] * 3.5
+                K_noise = noise[4] * 18
+                temp_noise = noise[5] * 0.3
+                humidity_noise = noise[6] * 2.0
+                moisture = _simulate_moisture(temp_np, hum_np, rain_np, solar_np, moisture_noise,
+                                              moisture_start, moisture_retention, drainage_rate,
+                                              base_moisture_offset,
+                                              zone_temp_offset + sensor_temp_micro,
+                                              zone_humidity_offset + sensor_humidity_micro,
+                                              self.historical_days, self.forecast_days)
+
                 # sensor ph baseline
-                pH_base = np.random.uniform(5.8, 6.6)
-                pH = pH_base + 0.1 * np.sin(2 * np.pi * np.arange(len(dates)) / 365) + np.random.normal(0, 0.15, len(dates))
+                pH_base = self.rng.uniform(5.8, 6.6)
+                pH = pH_base + 0.1 * sin_year + pH_noise
                 pH = np.clip(pH, 5.5, 7.0)
                 
                 # sensor nutrient baseline
-                N = np.zeros(len(dates))
-                N[0] = np.random.uniform(20, 45)  # wide start nitrogen
-                N_depletion = np.random.uniform(0.010, 0.035)  # varied depletion
-                N_base_offset = np.random.uniform(-3, 3)  # nitrogen bias
-                
-                for i in range(1, len(dates)):
-                    # boost depletion for forecast
-                    future_factor = 1.0 + (0.5 * (i - self.historical_days) / self.forecast_days) if i >= self.historical_days else 1.0
-                    
-                    N[i] = N[i-1] - (N_depletion * future_factor) + N_base_offset * 0.03 + np.random.normal(0, 1.2)
-                    if i % 90 == 0 and i < self.historical_days:  # quarterly fertilization history
-                        N[i] += np.random.uniform(10, 20)  # variable boost
-                    N[i] = np.clip(N[i], 10, 50)
+                N_start = self.rng.uniform(20, 45)  # wide start nitrogen
+                N_depletion = self.rng.uniform(0.010, 0.035)  # varied depletion
+                N_base_offset = self.rng.uniform(-3, 3)  # nitrogen bias
+
+                # pre-draw fertilization boosts for the kernel
+                N_boost = np.zeros(n)
+                boost_days = np.arange(90, self.historical_days, 90)
+                N_boost[boost_days] = self.rng.uniform(10, 20, len(boost_days))  # variable boost
+                N = _simulate_nitrogen(N_noise, N_boost, N_start, N_depletion, N_base_offset,
+                                       self.historical_days, self.forecast_days)
                 
-                P_base = np.random.uniform(15, 28)
-                P = P_base + np.random.normal(0, 3.5, len(dates)) - np.arange(len(dates)) * np.random.uniform(0.002, 0.010)
+                P_base = self.rng.uniform(15, 28)
+                P = P_base + P_noise - idx * self.rng.uniform(0.002, 0.010)
                 P = np.clip(P, 10, 35)
                 
-                K_base = np.random.uniform(160, 240)
-                K = K_base + np.random.normal(0, 18, len(dates)) - np.arange(len(dates)) * np.random.uniform(0.010, 0.035)
+                K_base = self.rng.uniform(160, 240)
+                K = K_base + K_noise - idx * self.rng.uniform(0.010, 0.035)
                 K = np.clip(K, 120, 280)
                 
-                for i, date in enumerate(dates):
-                    # compute sensor climate
-                    base_temp = weather_data.loc[i, 'temperature']
-                    base_humidity = weather_data.loc[i, 'humidity']
-                    
-                    # apply zone plus sensor tweak
-                    sensor_temp = base_temp + zone_temp_offset + sensor_temp_micro + np.random.normal(0, 0.3)
-                    sensor_humidity = base_humidity + zone_humidity_offset + sensor_humidity_micro + np.random.normal(0, 2.0)
-                    sensor_humidity = np.clip(sensor_humidity, 30, 95)
-                    
-                    rows.append({
-                        'date': date,
-                        'sensor_id': sensor['sensor_id'],
-                        'zone_id': zone_id,
-                        'ground_moisture': moisture[i],
-                        'temperature': sensor_temp,
-                        'humidity': sensor_humidity,
-                        'pH': pH[i],
-                        'nutrient_N': N[i],
-                        'nutrient_P': P[i],
-                        'nutrient_K': K[i]
-                    })
-        return pd.DataFrame(rows)
+                # compute sensor climate for all days at once
+                # apply zone plus sensor tweak
+                sensor_temp = temp_np + zone_temp_offset + sensor_temp_micro + temp_noise
+                sensor_humidity = hum_np + zone_humidity_offset + sensor_humidity_micro + humidity_noise
+                sensor_humidity = np.clip(sensor_humidity, 30, 95)
+
+                col_ids.append(np.full(n, sensor['sensor_id']))
+                col_zones.append(np.full(n, zone_id))
+                col_moisture.append(moisture)
+                col_temp.append(sensor_temp)
+                col_humidity.append(sensor_humidity)
+                col_pH.append(pH)
+                col_N.append(N)
+                col_P.append(P)
+                col_K.append(K)
+
+        return pd.DataFrame({
+            'date': np.tile(np.asarray(dates), len(col_ids)),
+            'sensor_id': np.concatenate(col_ids),
+            'zone_id': np.concatenate(col_zones),
+            'ground_moisture': np.concatenate(col_moisture),
+            'temperature': np.concatenate(col_temp),
+            'humidity': np.concatenate(col_humidity),
+            'pH': np.concatenate(col_pH),
+            'nutrient_N': np.concatenate(col_N),
+            'nutrient_P': np.concatenate(col_P),
+            'nutrient_K': np.concatenate(col_K)
+        })
     
     def _generate_plant_data(self, dates, sensor_data):
-        rows = []
-        for zone_id in self.config['sensors'].keys():
-            zone_sensors = sensor_data[sensor_data['zone_id'] == zone_id]
-            
-            for i, date in enumerate(dates):
-                month = date.month
-                stage = next((s['stage'] for s in self.config['growth_stages'] if month in s['months']), 'Dormant')
-                
-                day_moisture = zone_sensors[zone_sensors['date'] == date]['ground_moisture'].mean()
-                day_N = zone_sensors[zone_sensors['date'] == date]['nutrient_N'].mean()
-                
-                health = 0.7 + 0.1 * (day_moisture - 20) / 20 + 0.1 * (day_N - 20) / 20 + np.random.normal(0, 0.05)
-                health = np.clip(health, 0.3, 1.0)
-                
-                rows.append({
-                    'date': date,
-                    'zone_id': zone_id,
-                    'growth_stage': stage,
-                    'health_index': health
-                })
-        return pd.DataFrame(rows)
+        # aggregate zone means in one groupby pass instead of per-(zone, date) scans
+        agg = sensor_data.groupby(['zone_id', 'date'], sort=False)[['ground_moisture', 'nutrient_N']].mean().reset_index()
+
+        # month -> stage lookup table
+        month_to_stage = np.full(13, 'Dormant', dtype=object)
+        for s in self.config['growth_stages']:
+            for month in s['months']:
+                month_to_stage[month] = s['stage']
+        months = pd.to_datetime(agg['date']).dt.month.to_numpy()
+
+        # vectorized health formula over all (zone, date) pairs
+        health = (0.7 + 0.1 * (agg['ground_moisture'].to_numpy() - 20) / 20
+                  + 0.1 * (agg['nutrient_N'].to_numpy() - 20) / 20
+                  + self.rng.normal(0, 0.05, len(agg)))
+
+        return pd.DataFrame({
+            'date': agg['date'],
+            'zone_id': agg['zone_id'],
+            'growth_stage': month_to_stage[months],
+            'health_index': np.clip(health, 0.3, 1.0)
+        })
     
-    def _generate_interventions(self, dates):
-        rows = []
+    def _generate_interventions(self, dates, rng=None):
+        rng = rng if rng is not None else self.rng
+        dates_arr = np.asarray(dates)
+        irrigation_days = np.arange(0, self.historical_days, 14)  # fortnight irrigation history
+        fert_days = np.arange(0, self.historical_days, 90)        # quarterly nutrient history
+
+        frames = []
         for zone_id in self.config['sensors'].keys():
-            for i, date in enumerate(dates):
-                if i < self.historical_days and i % 14 == 0:  # fortnight irrigation history
-                    rows.append({
-                        'date': date,
-                        'zone_id': zone_id,
-                        'water_applied': np.random.uniform(15, 25),
-                        'fertilizer_N_applied': 0,
-                        'fertilizer_P_applied': 0,
-                        'fertilizer_K_applied': 0
-                    })
-                if i < self.historical_days and i % 90 == 0:  # quarterly nutrient history
-                    rows.append({
-                        'date': date,
-                        'zone_id': zone_id,
-                        'water_applied': 0,
-                        'fertilizer_N_applied': np.random.uniform(5, 10),
-                        'fertilizer_P_applied': np.random.uniform(3, 6),
-                        'fertilizer_K_applied': np.random.uniform(8, 12)
-                    })
-        return pd.DataFrame(rows)
+            frames.append(pd.DataFrame({
+                'date': dates_arr[irrigation_days],
+                'zone_id': zone_id,
+                'water_applied': rng.uniform(15, 25, len(irrigation_days)),
+                'fertilizer_N_applied': 0,
+                'fertilizer_P_applied': 0,
+                'fertilizer_K_applied': 0
+            }))
+            frames.append(pd.DataFrame({
+                'date': dates_arr[fert_days],
+                'zone_id': zone_id,
+                'water_applied': 0,
+                'fertilizer_N_applied': rng.uniform(5, 10, len(fert_days)),
+                'fertilizer_P_applied': rng.uniform(3, 6, len(fert_days)),
+                'fertilizer_K_applied': rng.uniform(8, 12, len(fert_days))
+            }))
+        return pd.concat(frames, ignore_index=True)
 
 if __name__ == '__main__':
     gen = VineyardDataGenerator()
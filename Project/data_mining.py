@@ -1,17 +1,19 @@
 import json
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans, DBSCAN
+try:
+    from sklearnex import patch_sklearn  # intel-accelerated sklearn kernels
+    patch_sklearn()
+except ImportError:
+    pass
+from sklearn.cluster import KMeans, MiniBatchKMeans, DBSCAN
 from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.ensemble import IsolationForest
 from sklearn.decomposition import PCA
 from sklearn.metrics import silhouette_score
 from scipy import stats
-import matplotlib
-matplotlib.use('Agg')  # noninteractive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
+from data_cache import dump_json, load_csv
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -21,15 +23,23 @@ class VineyardDataMiner:
             self.config = json.load(f)
         self.scaler = StandardScaler()
         self.robust_scaler = RobustScaler()
+        # sensor coordinate lookup, built once from the config
+        self._sensor_coords = {
+            sensor['sensor_id']: {'lon': sensor['lon'], 'lat': sensor['lat'], 'zone_id': zone_id}
+            for zone_id, sensors in self.config['sensors'].items()
+            for sensor in sensors
+        }
         
     def load_sensor_data(self, days_back=30):
         """load recent sensor data for mining"""
-        sensor_data = pd.read_csv('sensor_data.csv')
-        sensor_data['date'] = pd.to_datetime(sensor_data['date'])
+        sensor_data = load_csv('sensor_data.csv')
+        dates = pd.to_datetime(sensor_data['date'])
         
-        # get recent data
-        cutoff_date = sensor_data['date'].max() - timedelta(days=days_back)
-        recent_data = sensor_data[sensor_data['date'] >= cutoff_date].copy()
+        # get recent data without mutating the cached frame
+        cutoff_date = dates.max() - timedelta(days=days_back)
+        mask = dates >= cutoff_date
+        recent_data = sensor_data.loc[mask].copy()
+        recent_data['date'] = dates.loc[mask]
         
         return recent_data
     
@@ -37,33 +47,44 @@ class VineyardDataMiner:
         """detect outliers using z-score and iqr methods"""
         if columns is None:
             columns = ['ground_moisture', 'temperature', 'humidity', 'nutrient_N', 'nutrient_P', 'nutrient_K', 'pH']
-        
-        outliers = pd.DataFrame()
-        
-        for col in columns:
-            if col in data.columns:
-                # z-score method
-                z_scores = np.abs(stats.zscore(data[col].dropna()))
-                z_outliers = data[z_scores > z_threshold].copy()
-                z_outliers['outlier_method'] = 'z_score'
-                z_outliers['outlier_column'] = col
-                z_outliers['outlier_value'] = z_scores[z_scores > z_threshold]
-                
-                # iqr method
-                Q1 = data[col].quantile(0.25)
-                Q3 = data[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                
-                iqr_outliers = data[(data[col] < lower_bound) | (data[col] > upper_bound)].copy()
-                iqr_outliers['outlier_method'] = 'iqr'
-                iqr_outliers['outlier_column'] = col
-                iqr_outliers['outlier_value'] = data[(data[col] < lower_bound) | (data[col] > upper_bound)][col]
-                
-                outliers = pd.concat([outliers, z_outliers, iqr_outliers], ignore_index=True)
-        
-        return outliers.drop_duplicates()
+        # empty results keep the full outlier schema so downstream column
+        # filters (e.g. the mining report) work on clean data
+        empty = pd.DataFrame(columns=[*data.columns, 'outlier_method', 'outlier_column', 'outlier_value'])
+        cols = [col for col in columns if col in data.columns]
+        if not cols:
+            return empty
+
+        arr = data[cols].to_numpy(dtype=np.float64, copy=False)
+
+        # column-wise z-scores in one pass; nans stay nan and never pass the threshold
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = np.abs(stats.zscore(arr, axis=0, nan_policy='omit'))
+
+        # column-wise iqr bounds in one quantile call
+        q1, q3 = np.nanquantile(arr, [0.25, 0.75], axis=0)
+        iqr = q3 - q1
+        lower_bound = q1 - 1.5 * iqr
+        upper_bound = q3 + 1.5 * iqr
+
+        z_mask = z > z_threshold
+        iqr_mask = (arr < lower_bound) | (arr > upper_bound)
+
+        # gather (row, column) hits per method and assemble once
+        col_names = np.asarray(cols, dtype=object)
+        frames = []
+        for mask, method, values in ((z_mask, 'z_score', z), (iqr_mask, 'iqr', arr)):
+            rows, col_idx = np.nonzero(mask)
+            if len(rows) == 0:
+                continue
+            hits = data.iloc[rows].copy()
+            hits['outlier_method'] = method
+            hits['outlier_column'] = col_names[col_idx]
+            hits['outlier_value'] = values[rows, col_idx]
+            frames.append(hits)
+
+        if not frames:
+            return empty
+        return pd.concat(frames)
     
     def detect_outliers_isolation_forest(self, data, contamination=0.1):
         """detect outliers using isolation forest"""
@@ -73,21 +94,25 @@ class VineyardDataMiner:
         if len(available_cols) < 3:
             return pd.DataFrame()
         
-        # prepare features
-        features = data[available_cols].dropna()
+        # prepare features as a contiguous float32 buffer, masking nan rows
+        arr = data[available_cols].to_numpy(dtype=np.float32)
+        good = ~np.isnan(arr).any(axis=1)
+        features = np.ascontiguousarray(arr[good])
         if len(features) < 10:
             return pd.DataFrame()
-        
-        # fit isolation forest
-        iso_forest = IsolationForest(contamination=contamination, random_state=42, n_estimators=100)
+
+        # fit isolation forest; trees build in parallel on paper-default subsamples
+        iso_forest = IsolationForest(contamination=contamination, random_state=42, n_estimators=100,
+                                     n_jobs=-1, max_samples=min(256, len(features)), bootstrap=False)
         outlier_labels = iso_forest.fit_predict(features)
-        
+        scores = iso_forest.score_samples(features)
+
         # get outliers
-        outlier_indices = features.index[outlier_labels == -1]
-        outliers = data.loc[outlier_indices].copy()
+        is_outlier = outlier_labels == -1
+        outliers = data.iloc[np.flatnonzero(good)[is_outlier]].copy()
         outliers['outlier_method'] = 'isolation_forest'
-        outliers['outlier_score'] = iso_forest.score_samples(features)[outlier_labels == -1]
-        
+        outliers['outlier_score'] = scores[is_outlier]
+
         return outliers
     
     def clean_outliers(self, data, method='cap', outlier_data=None):
@@ -111,40 +136,80 @@ class VineyardDataMiner:
                     
         elif method == 'interpolate':
             # interpolate outlier values
-            for col in ['ground_moisture', 'temperature', 'humidity', 'nutrient_N', 'nutrient_P', 'nutrient_K', 'pH']:
-                if col in cleaned_data.columns:
-                    outlier_mask = cleaned_data.index.isin(outlier_data[outlier_data['outlier_column'] == col].index)
-                    cleaned_data.loc[outlier_mask, col] = np.nan
-                    cleaned_data[col] = cleaned_data.groupby('sensor_id')[col].interpolate(method='linear')
+            cols = [col for col in ['ground_moisture', 'temperature', 'humidity', 'nutrient_N', 'nutrient_P', 'nutrient_K', 'pH']
+                    if col in cleaned_data.columns]
+            values = cleaned_data[cols].to_numpy(dtype=np.float64)
+
+            # blank every flagged cell in one scatter
+            flagged = outlier_data[outlier_data['outlier_column'].isin(cols)]
+            rows = cleaned_data.index.get_indexer(flagged.index)
+            col_pos = flagged['outlier_column'].map({col: i for i, col in enumerate(cols)}).to_numpy()
+            keep = rows >= 0
+            values[rows[keep], col_pos[keep]] = np.nan
+
+            # linear interpolation over contiguous per-sensor runs, one numpy pass per column
+            codes, _ = pd.factorize(cleaned_data['sensor_id'].to_numpy(), sort=True)
+            order = np.lexsort((cleaned_data['date'].to_numpy(), codes))
+            sorted_vals = values[order]
+            bounds = np.flatnonzero(np.diff(codes[order])) + 1
+            for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(codes)]):
+                segment = sorted_vals[start:stop]
+                idx = np.arange(stop - start)
+                for j in range(len(cols)):
+                    bad = np.isnan(segment[:, j])
+                    if bad.any() and not bad.all():
+                        segment[bad, j] = np.interp(idx[bad], idx[~bad], segment[~bad, j])
+            values[order] = sorted_vals
+            cleaned_data[cols] = values
         
         return cleaned_data
     
+    def _group_mean_std(self, codes, n_groups, x):
+        """per-group mean and sample std via bincount, skipping nans"""
+        good = ~np.isnan(x)
+        xg = np.where(good, x, 0.0)
+        n = np.bincount(codes, weights=good.astype(np.float64), minlength=n_groups)
+        s = np.bincount(codes, weights=xg, minlength=n_groups)
+        s2 = np.bincount(codes, weights=xg * xg, minlength=n_groups)
+        n_safe = np.where(n == 0, 1, n)
+        mean = s / n_safe
+        # ddof=1 to match pandas; groups of one observation get std 0
+        var = np.where(n > 1, (s2 - n * mean * mean) / np.where(n > 1, n - 1, 1), 0)
+        return mean, np.sqrt(np.maximum(var, 0))
+
+    def _group_min_max(self, codes, n_groups, x):
+        """per-group min and max via ufunc.at, skipping nans"""
+        mn = np.full(n_groups, np.inf)
+        mx = np.full(n_groups, -np.inf)
+        np.fmin.at(mn, codes, x)
+        np.fmax.at(mx, codes, x)
+        return mn, mx
+
     def cluster_sensors_spatial(self, data, n_clusters=None, method='kmeans'):
         """cluster sensors based on spatial patterns"""
-        # aggregate sensor data
-        sensor_features = data.groupby('sensor_id').agg({
-            'ground_moisture': ['mean', 'std'],
-            'temperature': ['mean', 'std'],
-            'humidity': ['mean', 'std'],
-            'nutrient_N': ['mean', 'std'],
-            'nutrient_P': ['mean', 'std'],
-            'nutrient_K': ['mean', 'std'],
-            'pH': ['mean', 'std']
-        }).fillna(0)
-        
-        # flatten column names
-        sensor_features.columns = ['_'.join(col).strip() for col in sensor_features.columns]
-        
-        if len(sensor_features) < 3:
+        feature_cols = ['ground_moisture', 'temperature', 'humidity', 'nutrient_N', 'nutrient_P', 'nutrient_K', 'pH']
+
+        # aggregate per sensor with factorized bincount reductions instead of a multi-agg groupby
+        codes, sensor_ids = pd.factorize(data['sensor_id'].to_numpy(), sort=True)
+        if len(sensor_ids) < 3:
             return None
-        
-        # scale features
-        features_scaled = self.scaler.fit_transform(sensor_features)
+
+        stat_cols = []
+        stat_names = []
+        for col in feature_cols:
+            mean, std = self._group_mean_std(codes, len(sensor_ids), data[col].to_numpy(dtype=np.float64))
+            stat_cols.extend([mean, std])
+            stat_names.extend([col + '_mean', col + '_std'])
+        features = np.nan_to_num(np.column_stack(stat_cols))
+
+        # scale features; float32 halves the bandwidth for the kmeans fits below.
+        # the scaler is local because the shared miner serves concurrent requests
+        features_scaled = StandardScaler().fit_transform(np.ascontiguousarray(features, dtype=np.float32))
         
         if method == 'kmeans':
             if n_clusters is None:
                 # find optimal clusters using elbow method
-                n_clusters = self._find_optimal_clusters(features_scaled, max_k=min(8, len(sensor_features)-1))
+                n_clusters = self._find_optimal_clusters(features_scaled, max_k=min(8, len(sensor_ids)-1))
             
             clusterer = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
             cluster_labels = clusterer.fit_predict(features_scaled)
@@ -153,95 +218,97 @@ class VineyardDataMiner:
             clusterer = DBSCAN(eps=0.5, min_samples=2)
             cluster_labels = clusterer.fit_predict(features_scaled)
             
-        # add sensor coordinates
-        sensor_coords = {}
-        for zone_id, sensors in self.config['sensors'].items():
-            for sensor in sensors:
-                sensor_coords[sensor['sensor_id']] = {
-                    'lon': sensor['lon'],
-                    'lat': sensor['lat'],
-                    'zone_id': zone_id
-                }
-        
         # create results
         cluster_results = []
-        for i, (sensor_id, cluster_id) in enumerate(zip(sensor_features.index, cluster_labels)):
-            coords = sensor_coords.get(sensor_id, {})
+        for sensor_id, cluster_id, feature_row in zip(sensor_ids, cluster_labels, features):
+            coords = self._sensor_coords.get(sensor_id, {})
             cluster_results.append({
                 'sensor_id': sensor_id,
                 'cluster_id': int(cluster_id),
                 'zone_id': coords.get('zone_id', 'unknown'),
                 'lon': coords.get('lon', 0),
                 'lat': coords.get('lat', 0),
-                **dict(zip(sensor_features.columns, sensor_features.loc[sensor_id]))
+                **dict(zip(stat_names, feature_row))
             })
         
         return pd.DataFrame(cluster_results)
     
     def cluster_temporal_patterns(self, data, n_clusters=4):
         """cluster based on temporal patterns"""
-        # create daily aggregates per sensor
-        daily_patterns = data.groupby(['sensor_id', data['date'].dt.date]).agg({
-            'ground_moisture': 'mean',
-            'temperature': 'mean',
-            'humidity': 'mean',
-            'nutrient_N': 'mean'
-        }).reset_index()
-        
-        # pivot to create time series features
-        pivot_data = daily_patterns.pivot(index='sensor_id', columns='date', values='ground_moisture')
-        pivot_data = pivot_data.fillna(method='ffill', axis=1).fillna(method='bfill', axis=1).fillna(0)
-        
-        if len(pivot_data) < 3 or pivot_data.shape[1] < 3:
+        # build the sensor x day moisture matrix straight from factorized codes,
+        # skipping the two-key groupby and the pivot materialization
+        sid_codes, sensor_ids = pd.factorize(data['sensor_id'].to_numpy(), sort=True)
+        day_codes, _ = pd.factorize(data['date'].to_numpy().astype('datetime64[D]'), sort=True)
+        n_days = day_codes.max() + 1 if len(day_codes) else 0
+
+        if len(sensor_ids) < 3 or n_days < 3:
             return None
-        
+
+        x = data['ground_moisture'].to_numpy(dtype=np.float32)
+        good = ~np.isnan(x)
+        sum_buf = np.zeros((len(sensor_ids), n_days), dtype=np.float32)
+        cnt_buf = np.zeros_like(sum_buf)
+        np.add.at(sum_buf, (sid_codes[good], day_codes[good]), x[good])
+        np.add.at(cnt_buf, (sid_codes[good], day_codes[good]), 1.0)
+        arr = np.where(cnt_buf > 0, sum_buf / np.maximum(cnt_buf, 1), np.nan)
+
+        # ffill/bfill/zero-fill along rows in one numpy pass instead of three frame copies
+        arr = self._fill_rows(arr)
+
         # apply pca for dimensionality reduction
-        pca = PCA(n_components=min(5, pivot_data.shape[1]))
-        pca_features = pca.fit_transform(pivot_data)
-        
+        pca = PCA(n_components=min(5, arr.shape[1]))
+        pca_features = pca.fit_transform(arr)
+
         # cluster temporal patterns
         kmeans = KMeans(n_clusters=n_clusters, random_state=42)
         cluster_labels = kmeans.fit_predict(pca_features)
-        
+
         results = []
-        for sensor_id, cluster_id in zip(pivot_data.index, cluster_labels):
+        days = np.arange(arr.shape[1])
+        for sensor_id, cluster_id, series in zip(sensor_ids, cluster_labels, arr):
             results.append({
                 'sensor_id': sensor_id,
                 'temporal_cluster': int(cluster_id),
-                'pattern_variance': np.var(pivot_data.loc[sensor_id].values),
-                'pattern_trend': np.polyfit(range(len(pivot_data.columns)), pivot_data.loc[sensor_id].values, 1)[0]
+                'pattern_variance': np.var(series),
+                'pattern_trend': np.polyfit(days, series, 1)[0]
             })
-        
+
         return pd.DataFrame(results)
+
+    def _fill_rows(self, arr):
+        """forward-fill, backward-fill, then zero-fill each row of a 2d float array"""
+        for flip in (False, True):
+            view = arr[:, ::-1] if flip else arr
+            idx = np.where(~np.isnan(view), np.arange(view.shape[1]), 0)
+            np.maximum.accumulate(idx, axis=1, out=idx)
+            filled = view[np.arange(view.shape[0])[:, None], idx]
+            arr = filled[:, ::-1] if flip else filled
+        return np.nan_to_num(arr, copy=False, nan=0.0)
     
     def find_anomalous_zones(self, data, threshold_percentile=95):
         """identify zones with unusual patterns"""
-        zone_stats = data.groupby('zone_id').agg({
-            'ground_moisture': ['mean', 'std', 'min', 'max'],
-            'temperature': ['mean', 'std', 'min', 'max'],
-            'humidity': ['mean', 'std', 'min', 'max'],
-            'nutrient_N': ['mean', 'std', 'min', 'max']
-        })
-        
-        # flatten columns
-        zone_stats.columns = ['_'.join(col).strip() for col in zone_stats.columns]
-        
-        # calculate anomaly scores
-        anomaly_scores = {}
-        for zone_id in zone_stats.index:
-            # composite score based on deviation from median
-            score = 0
-            for col in zone_stats.columns:
-                if 'std' in col:  # high variability indicator
-                    zone_val = zone_stats.loc[zone_id, col]
-                    median_val = zone_stats[col].median()
-                    score += abs(zone_val - median_val) / (median_val + 1e-8)
-            
-            anomaly_scores[zone_id] = score
-        
+        # aggregate per zone with the same factorized reductions as the sensor clustering
+        codes, zone_ids = pd.factorize(data['zone_id'].to_numpy(), sort=True)
+        stat_cols = []
+        stat_names = []
+        for col in ['ground_moisture', 'temperature', 'humidity', 'nutrient_N']:
+            x = data[col].to_numpy(dtype=np.float64)
+            mean, std = self._group_mean_std(codes, len(zone_ids), x)
+            mn, mx = self._group_min_max(codes, len(zone_ids), x)
+            stat_cols.extend([mean, std, mn, mx])
+            stat_names.extend([col + suffix for suffix in ('_mean', '_std', '_min', '_max')])
+        zone_stats = pd.DataFrame(np.column_stack(stat_cols), index=zone_ids, columns=stat_names)
+        
+        # composite score: deviation from the median of the std columns, one broadcast
+        M = zone_stats.to_numpy()
+        med = np.median(M, axis=0)
+        std_mask = np.array(['std' in c for c in zone_stats.columns])
+        scores = (np.abs(M - med) / (med + 1e-8))[:, std_mask].sum(axis=1)
+        anomaly_scores = dict(zip(zone_stats.index, scores))
+
         # identify anomalous zones
-        threshold = np.percentile(list(anomaly_scores.values()), threshold_percentile)
-        anomalous_zones = [zone for zone, score in anomaly_scores.items() if score > threshold]
+        threshold = np.percentile(scores, threshold_percentile)
+        anomalous_zones = zone_stats.index[scores > threshold].tolist()
         
         return {
             'anomalous_zones': anomalous_zones,
@@ -251,34 +318,50 @@ class VineyardDataMiner:
     
     def detect_sensor_drift(self, data, window_days=7):
         """detect sensors showing systematic drift"""
+        data_sorted = data.sort_values(['sensor_id', 'date'])
+        codes, sensor_ids = pd.factorize(data_sorted['sensor_id'].to_numpy())
+        n_groups = len(sensor_ids)
+        n = np.bincount(codes, minlength=n_groups).astype(np.float64)
+
+        # within-sensor sample index is the regression x; groups are contiguous after the sort
+        starts = np.zeros(n_groups)
+        starts[1:] = np.cumsum(n[:-1])
+        x = np.arange(len(codes)) - starts[codes]
+
+        Sx = np.bincount(codes, weights=x, minlength=n_groups)
+        Sxx = np.bincount(codes, weights=x * x, minlength=n_groups)
+        denom_x = n * Sxx - Sx * Sx
+        valid = (n >= window_days) & (n > 5) & (denom_x > 0)
+
         drift_results = []
-        
-        for sensor_id in data['sensor_id'].unique():
-            sensor_data = data[data['sensor_id'] == sensor_id].sort_values('date')
-            
-            if len(sensor_data) < window_days:
+        for metric in ['ground_moisture', 'temperature', 'nutrient_N', 'pH']:
+            if metric not in data_sorted.columns:
                 continue
-                
-            # check for drift in key metrics
-            for metric in ['ground_moisture', 'temperature', 'nutrient_N', 'pH']:
-                if metric in sensor_data.columns:
-                    values = sensor_data[metric].values
-                    if len(values) > 5:
-                        # linear trend test
-                        x = np.arange(len(values))
-                        slope, _, r_value, p_value, _ = stats.linregress(x, values)
-                        
-                        # significant trend indicates drift
-                        if p_value < 0.05 and abs(r_value) > 0.7:
-                            drift_results.append({
-                                'sensor_id': sensor_id,
-                                'metric': metric,
-                                'drift_slope': slope,
-                                'correlation': r_value,
-                                'p_value': p_value,
-                                'severity': 'high' if abs(slope) > 1.0 else 'moderate'
-                            })
-        
+            # closed-form linregress over all sensors at once
+            y = data_sorted[metric].to_numpy(dtype=np.float64)
+            Sy = np.bincount(codes, weights=y, minlength=n_groups)
+            Sxy = np.bincount(codes, weights=x * y, minlength=n_groups)
+            Syy = np.bincount(codes, weights=y * y, minlength=n_groups)
+
+            cov = n * Sxy - Sx * Sy
+            denom_y = n * Syy - Sy * Sy
+            with np.errstate(divide='ignore', invalid='ignore'):
+                slope = cov / denom_x
+                r_value = cov / np.sqrt(denom_x * denom_y)
+                t_stat = r_value * np.sqrt((n - 2) / np.maximum(1 - r_value * r_value, 1e-12))
+                p_value = 2 * stats.t.sf(np.abs(t_stat), np.maximum(n - 2, 1))
+
+            # significant trend indicates drift
+            for g in np.flatnonzero(valid & (p_value < 0.05) & (np.abs(r_value) > 0.7)):
+                drift_results.append({
+                    'sensor_id': sensor_ids[g],
+                    'metric': metric,
+                    'drift_slope': slope[g],
+                    'correlation': r_value[g],
+                    'p_value': p_value[g],
+                    'severity': 'high' if abs(slope[g]) > 1.0 else 'moderate'
+                })
+
         return pd.DataFrame(drift_results)
     
     def generate_mining_report(self, data, output_path='mining_report.json'):
@@ -355,8 +438,7 @@ class VineyardDataMiner:
         report['recommendations'] = recommendations
         
         # save report
-        with open(output_path, 'w') as f:
-            json.dump(report, f, indent=2, default=str)
+        dump_json(report, output_path)
         
         return report
     
@@ -367,12 +449,15 @@ class VineyardDataMiner:
         k_range = range(2, min(max_k + 1, len(features)))
         
         for k in k_range:
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
+            # the scan only picks k, so a cheap mini-batch fit is enough here
+            kmeans = MiniBatchKMeans(n_clusters=k, batch_size=256, n_init=3, random_state=42)
             kmeans.fit(features)
             inertias.append(kmeans.inertia_)
-            
+
             if len(np.unique(kmeans.labels_)) > 1:
-                sil_score = silhouette_score(features, kmeans.labels_)
+                # sample the silhouette to cap its O(n^2) pairwise distances
+                sil_score = silhouette_score(features, kmeans.labels_,
+                                             sample_size=min(500, len(features)), random_state=42)
                 silhouette_scores.append(sil_score)
             else:
                 silhouette_scores.append(0)
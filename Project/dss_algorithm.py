@@ -2,28 +2,71 @@ import json
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from data_cache import dump_json, load_csv
 from spatial_interpolation import SpatialInterpolator
 
+try:
+    from numba import njit
+
+    @njit(cache=True, fastmath=True)
+    def _water_deficit(moisture, demand, effective_rain, residual_water):
+        """Per-sensor water need for one zone; compiles to packed float math"""
+        out = np.empty(moisture.shape[0])
+        for i in range(moisture.shape[0]):
+            need = demand - effective_rain - (moisture[i] - 20.0) - residual_water
+            out[i] = need if need > 0.0 else 0.0
+        return out
+
+    @njit(cache=True, fastmath=True)
+    def _npk_deficit(npk, opt_npk, factor):
+        """Per-sensor N/P/K deficits for one zone"""
+        out = np.empty(npk.shape)
+        for i in range(npk.shape[0]):
+            for j in range(3):
+                d = (opt_npk[j] - npk[i, j]) * factor
+                out[i, j] = d if d > 0.0 else 0.0
+        return out
+except ImportError:  # fall back to the plain numpy expressions when numba is absent
+    def _water_deficit(moisture, demand, effective_rain, residual_water):
+        """Per-sensor water need for one zone"""
+        return np.maximum(0, demand - effective_rain - (moisture - 20.0) - residual_water)
+
+    def _npk_deficit(npk, opt_npk, factor):
+        """Per-sensor N/P/K deficits for one zone"""
+        return np.maximum(0, (opt_npk - npk) * factor)
+
 class VineyardDSS:
     def __init__(self, config_path='vineyard_config.json'):
         with open(config_path, 'r') as f:
             self.config = json.load(f)
         self.interpolator = SpatialInterpolator(config_path)
+        # config-derived lookups, built once so the hot loops do O(1) access
+        self._stage_by_name = {s['stage']: s for s in self.config['growth_stages']}
+        self._default_stage = self.config['growth_stages'][0]
+        optimal = self.config['optimal_ranges']['nutrients']
+        self._optimal_npk = np.array([optimal[k]['optimal'] for k in ('N', 'P', 'K')], dtype=np.float32)
     
+    def _et_vec(self, temp, solar, humidity):
+        """Simplified Hargreaves ET over arrays; (temp_max - temp_min) is the constant 10"""
+        et = 0.0023 * (temp + 17.8) * np.sqrt(10.0) * solar / 41.868
+        et = et * (1 - humidity / 200)  # humidity trim
+        return np.maximum(0, et)
+
     def calculate_et(self, temp, solar, humidity):
         """Simplified Hargreaves ET calculation"""
-        temp_max = temp + 5
-        temp_min = temp - 5
-        et = 0.0023 * (temp + 17.8) * (temp_max - temp_min)**0.5 * solar / 41.868
-        et *= (1 - humidity / 200)  # humidity trim
-        return max(0, et)
+        return float(self._et_vec(temp, solar, humidity))
     
-    def calculate_water_prescription(self, target_date_str):
-        """Calculate water needs for target date"""
-        sensor_data = pd.read_csv('sensor_data.csv')
-        weather_data = pd.read_csv('weather_data.csv')
-        plant_data = pd.read_csv('plant_data.csv')
-        intervention_data = pd.read_csv('intervention_data.csv')
+    def calculate_water_prescription(self, target_date_str, sensor_data=None, weather_data=None,
+                                     plant_data=None, intervention_data=None):
+        """Calculate water needs for target date; frames load on demand when not passed in"""
+        if sensor_data is None:
+            sensor_data = load_csv('sensor_data.csv')
+        if weather_data is None:
+            weather_data = load_csv('weather_data.csv')
+        if plant_data is None:
+            plant_data = load_csv('plant_data.csv')
+        if intervention_data is None:
+            intervention_data = load_csv('intervention_data.csv')
         
         target_date = datetime.strptime(target_date_str, '%Y-%m-%d')
         today = sensor_data['date'].max()
@@ -35,11 +78,9 @@ class VineyardDSS:
         forecast_data = weather_data[weather_data['date'] > today]
         forecast_data = forecast_data[forecast_data['date'] <= target_date_str]
         
-        cumulative_et = 0
-        cumulative_rain = 0
-        for _, row in forecast_data.iterrows():
-            cumulative_et += self.calculate_et(row['temperature'], row['solar_radiation'], row['humidity'])
-            cumulative_rain += row['rainfall']
+        arr = forecast_data[['temperature', 'solar_radiation', 'humidity']].to_numpy()
+        cumulative_et = float(self._et_vec(arr[:, 0], arr[:, 1], arr[:, 2]).sum())
+        cumulative_rain = float(forecast_data['rainfall'].to_numpy().sum())
         
         # boost needs with time
         time_multiplier = 1.0 + max(0, days_ahead * 0.05)  # five percent daily
@@ -51,15 +92,18 @@ class VineyardDSS:
         sensor_needs = {}
         current_sensor = sensor_data[sensor_data['date'] == target_date_str]
         current_plant = plant_data[plant_data['date'] == target_date_str]
-        
+
+        # split by zone once instead of re-scanning the frames per zone
+        sensor_groups = {k: g for k, g in current_sensor.groupby('zone_id', sort=False, observed=True)}
+        plant_groups = {k: g for k, g in current_plant.groupby('zone_id', sort=False, observed=True)}
+
         for zone_id in self.config['sensors'].keys():
-            zone_sensors = current_sensor[current_sensor['zone_id'] == zone_id]
-            zone_plant = current_plant[current_plant['zone_id'] == zone_id]
-            
+            zone_sensors = sensor_groups.get(zone_id, current_sensor.iloc[0:0])
+            zone_plant = plant_groups.get(zone_id, current_plant.iloc[0:0])
+
             growth_stage = zone_plant['growth_stage'].values[0] if len(zone_plant) > 0 else 'Dormant'
-            
-            stage_info = next((s for s in self.config['growth_stages'] if s['stage'] == growth_stage), 
-                            self.config['growth_stages'][0])
+
+            stage_info = self._stage_by_name.get(growth_stage, self._default_stage)
             water_factor = stage_info['water_factor']
             
             # check recent irrigation
@@ -70,31 +114,30 @@ class VineyardDSS:
             recent_water = recent_irrigation['water_applied'].sum()
             residual_water = recent_water * 0.3  # leave thirty percent
             
-            # loop sensor entries
-            zone_water_needs = []
-            for _, sensor_row in zone_sensors.iterrows():
-                sensor_id = sensor_row['sensor_id']
-                sensor_moisture = sensor_row['ground_moisture']
-                
-                water_deficit = (cumulative_et * water_factor * time_multiplier) - effective_rain - (sensor_moisture - 20) - residual_water
-                sensor_water_need = max(0, water_deficit)
-                
+            # vectorize the deficit over the zone's sensors
+            sensor_ids = zone_sensors['sensor_id'].to_numpy()
+            moisture = zone_sensors['ground_moisture'].to_numpy(dtype=np.float64)
+            needs = _water_deficit(moisture, cumulative_et * water_factor * time_multiplier,
+                                   effective_rain, float(residual_water))
+
+            for sensor_id, need, sensor_moisture in zip(sensor_ids, needs, moisture):
                 sensor_needs[sensor_id] = {
-                    'water_mm': round(sensor_water_need, 2),
+                    'water_mm': round(float(need), 2),
                     'zone_id': zone_id,
-                    'current_moisture': round(sensor_moisture, 2)
+                    'current_moisture': round(float(sensor_moisture), 2)
                 }
-                zone_water_needs.append(sensor_water_need)
-            
+
             # keep zone average
-            water_needs[zone_id] = round(np.mean(zone_water_needs), 2) if zone_water_needs else 0
+            water_needs[zone_id] = round(float(needs.mean()), 2) if len(needs) else 0
         
         return water_needs, sensor_needs
     
-    def calculate_fertilizer_prescription(self, target_date_str):
-        """Calculate fertilizer needs for target date"""
-        sensor_data = pd.read_csv('sensor_data.csv')
-        plant_data = pd.read_csv('plant_data.csv')
+    def calculate_fertilizer_prescription(self, target_date_str, sensor_data=None, plant_data=None):
+        """Calculate fertilizer needs for target date; frames load on demand when not passed in"""
+        if sensor_data is None:
+            sensor_data = load_csv('sensor_data.csv')
+        if plant_data is None:
+            plant_data = load_csv('plant_data.csv')
         
         today = sensor_data['date'].max()
         today_dt = datetime.strptime(today, '%Y-%m-%d')
@@ -109,53 +152,45 @@ class VineyardDSS:
         
         fertilizer_needs = {}
         sensor_fertilizer_needs = {}
-        
+
+        # split by zone once instead of re-scanning the frames per zone
+        sensor_groups = {k: g for k, g in current_sensor.groupby('zone_id', sort=False, observed=True)}
+        plant_groups = {k: g for k, g in current_plant.groupby('zone_id', sort=False, observed=True)}
+
         for zone_id in self.config['sensors'].keys():
-            zone_sensors = current_sensor[current_sensor['zone_id'] == zone_id]
-            zone_plant = current_plant[current_plant['zone_id'] == zone_id]
-            
+            zone_sensors = sensor_groups.get(zone_id, current_sensor.iloc[0:0])
+            zone_plant = plant_groups.get(zone_id, current_plant.iloc[0:0])
+
             growth_stage = zone_plant['growth_stage'].values[0] if len(zone_plant) > 0 else 'Dormant'
-            stage_info = next((s for s in self.config['growth_stages'] if s['stage'] == growth_stage), 
-                            self.config['growth_stages'][0])
-            
-            optimal = self.config['optimal_ranges']['nutrients']
+            stage_info = self._stage_by_name.get(growth_stage, self._default_stage)
             uptake_factor = stage_info['nutrient_uptake']
-            
-            # loop sensor entries
-            zone_N_needs = []
-            zone_P_needs = []
-            zone_K_needs = []
-            
-            for _, sensor_row in zone_sensors.iterrows():
-                sensor_id = sensor_row['sensor_id']
-                sensor_N = sensor_row['nutrient_N']
-                sensor_P = sensor_row['nutrient_P']
-                sensor_K = sensor_row['nutrient_K']
-                
-                N_deficit = max(0, (optimal['N']['optimal'] - sensor_N) * uptake_factor * time_multiplier)
-                P_deficit = max(0, (optimal['P']['optimal'] - sensor_P) * uptake_factor * time_multiplier)
-                K_deficit = max(0, (optimal['K']['optimal'] - sensor_K) * uptake_factor * time_multiplier)
-                
+
+            # vectorize the three deficits over the zone's sensors
+            sensor_ids = zone_sensors['sensor_id'].to_numpy()
+            npk = zone_sensors[['nutrient_N', 'nutrient_P', 'nutrient_K']].to_numpy(dtype=np.float64)
+            deficits = _npk_deficit(npk, self._optimal_npk.astype(np.float64), uptake_factor * time_multiplier)
+
+            for sensor_id, deficit, current in zip(sensor_ids, deficits, npk):
                 sensor_fertilizer_needs[sensor_id] = {
-                    'N': round(N_deficit, 2),
-                    'P': round(P_deficit, 2),
-                    'K': round(K_deficit, 2),
+                    'N': round(float(deficit[0]), 2),
+                    'P': round(float(deficit[1]), 2),
+                    'K': round(float(deficit[2]), 2),
                     'zone_id': zone_id,
-                    'current_N': round(sensor_N, 2),
-                    'current_P': round(sensor_P, 2),
-                    'current_K': round(sensor_K, 2)
+                    'current_N': round(float(current[0]), 2),
+                    'current_P': round(float(current[1]), 2),
+                    'current_K': round(float(current[2]), 2)
                 }
-                
-                zone_N_needs.append(N_deficit)
-                zone_P_needs.append(P_deficit)
-                zone_K_needs.append(K_deficit)
-            
+
             # keep zone average
-            fertilizer_needs[zone_id] = {
-                'N': round(np.mean(zone_N_needs), 2) if zone_N_needs else 0,
-                'P': round(np.mean(zone_P_needs), 2) if zone_P_needs else 0,
-                'K': round(np.mean(zone_K_needs), 2) if zone_K_needs else 0
-            }
+            if len(deficits):
+                zone_mean = deficits.mean(axis=0)
+                fertilizer_needs[zone_id] = {
+                    'N': round(float(zone_mean[0]), 2),
+                    'P': round(float(zone_mean[1]), 2),
+                    'K': round(float(zone_mean[2]), 2)
+                }
+            else:
+                fertilizer_needs[zone_id] = {'N': 0, 'P': 0, 'K': 0}
         
         return fertilizer_needs, sensor_fertilizer_needs
     
@@ -178,15 +213,19 @@ class VineyardDSS:
             }
         }
     
+    def _npk_totals(self, fertilizer_needs, zone_area):
+        """Sum N/P/K over zones in one pass, scaled from mm to kg"""
+        vals = np.fromiter((v for f in fertilizer_needs.values() for v in (f['N'], f['P'], f['K'])),
+                           dtype=np.float64, count=3 * len(fertilizer_needs)).reshape(-1, 3)
+        return vals.sum(axis=0) * zone_area / 1000
+
     def calculate_fertilizer_only_cost(self, fertilizer_needs):
         """Calculate cost for fertilizer prescription only"""
         costs = self.config['costs']
         zone_area = 5000  # zone size about 5000 m2
-        
-        total_N = sum(f['N'] for f in fertilizer_needs.values()) * zone_area / 1000
-        total_P = sum(f['P'] for f in fertilizer_needs.values()) * zone_area / 1000
-        total_K = sum(f['K'] for f in fertilizer_needs.values()) * zone_area / 1000
-        
+
+        total_N, total_P, total_K = self._npk_totals(fertilizer_needs, zone_area)
+
         N_cost = total_N * costs['fertilizer_N_per_kg']
         P_cost = total_P * costs['fertilizer_P_per_kg']
         K_cost = total_K * costs['fertilizer_K_per_kg']
@@ -217,11 +256,9 @@ class VineyardDSS:
         total_water = sum(water_needs.values()) * zone_area / 1000  # convert mm to m3
         water_cost = total_water * costs['water_per_m3']
         electricity_cost = total_water * costs['pumping_energy_per_m3'] * costs['electricity_per_kwh']
-        
-        total_N = sum(f['N'] for f in fertilizer_needs.values()) * zone_area / 1000
-        total_P = sum(f['P'] for f in fertilizer_needs.values()) * zone_area / 1000
-        total_K = sum(f['K'] for f in fertilizer_needs.values()) * zone_area / 1000
-        
+
+        total_N, total_P, total_K = self._npk_totals(fertilizer_needs, zone_area)
+
         N_cost = total_N * costs['fertilizer_N_per_kg']
         P_cost = total_P * costs['fertilizer_P_per_kg']
         K_cost = total_K * costs['fertilizer_K_per_kg']
@@ -245,8 +282,16 @@ class VineyardDSS:
     
     def generate_prescription(self, target_date_str):
         """Generate full prescription with heatmaps"""
-        water_needs, sensor_water_needs = self.calculate_water_prescription(target_date_str)
-        fertilizer_needs, sensor_fertilizer_needs = self.calculate_fertilizer_prescription(target_date_str)
+        # load each frame once and thread it through both calculations
+        sensor_data = load_csv('sensor_data.csv')
+        weather_data = load_csv('weather_data.csv')
+        plant_data = load_csv('plant_data.csv')
+        intervention_data = load_csv('intervention_data.csv')
+
+        water_needs, sensor_water_needs = self.calculate_water_prescription(
+            target_date_str, sensor_data, weather_data, plant_data, intervention_data)
+        fertilizer_needs, sensor_fertilizer_needs = self.calculate_fertilizer_prescription(
+            target_date_str, sensor_data, plant_data)
         cost = self.calculate_cost(water_needs, fertilizer_needs)
         
         prescription = {
@@ -258,8 +303,7 @@ class VineyardDSS:
             'cost_estimate': cost
         }
         
-        with open('prescription.json', 'w') as f:
-            json.dump(prescription, f, indent=2)
+        dump_json(prescription, 'prescription.json')
         
         return prescription
 
@@ -1,172 +1,262 @@
 import json
 import numpy as np
 import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # noninteractive backend
-import matplotlib.pyplot as plt
 from matplotlib.colors import LinearSegmentedColormap
 from matplotlib.path import Path
-from matplotlib.patches import PathPatch
-import seaborn as sns
+from PIL import Image, ImageDraw
 import io
 import base64
+import functools
+from data_cache import load_day
 from spatial_interpolation import SpatialInterpolator
-from scipy.interpolate import griddata
+from scipy.interpolate import LinearNDInterpolator, NearestNDInterpolator, CloughTocher2DInterpolator
+from scipy.spatial import Delaunay
+
+try:
+    from numba import njit, prange
+
+    @njit(parallel=True, cache=True)
+    def _points_in_poly(xs, ys, poly_x, poly_y):
+        """Jordan ray-casting point-in-polygon over flat coordinate arrays"""
+        n = poly_x.shape[0]
+        out = np.zeros(xs.shape[0], dtype=np.bool_)
+        for k in prange(xs.shape[0]):
+            x, y = xs[k], ys[k]
+            inside = False
+            j = n - 1
+            for i in range(n):
+                if (poly_y[i] > y) != (poly_y[j] > y):
+                    if x < (poly_x[j] - poly_x[i]) * (y - poly_y[i]) / (poly_y[j] - poly_y[i]) + poly_x[i]:
+                        inside = not inside
+                j = i
+            out[k] = inside
+        return out
+except ImportError:  # matplotlib Path handles the no-numba case
+    _points_in_poly = None
+
+@functools.lru_cache(maxsize=8)
+def _cached_delaunay(points_bytes, n_points):
+    return Delaunay(np.frombuffer(points_bytes).reshape(n_points, 2))
+
+def _triangulation(points):
+    """Delaunay triangulation cached on the point set; boundary vertices and
+    sensor positions repeat across calls, so the qhull cost is paid once"""
+    pts = np.ascontiguousarray(points, dtype=np.float64)
+    return _cached_delaunay(pts.tobytes(), len(pts))
+
+# shared color ramp for every heatmap, pre-quantized to a uint8 LUT so mapping
+# a grid is an integer gather instead of a float64 RGBA round trip per pixel
+_CMAP = LinearSegmentedColormap.from_list(
+    'vineyard', ['#00ff00', '#88ff00', '#ffff00', '#ff8800', '#ff0000'], N=256)
+_LUT = _CMAP(np.linspace(0.0, 1.0, 256), bytes=True)
 
 class HeatmapGenerator:
     def __init__(self, config_path='vineyard_config.json'):
         with open(config_path, 'r') as f:
             self.config = json.load(f)
         self.interpolator = SpatialInterpolator(config_path)
+        # zone geometry prepared once: (name, zone_id, boundary vertices, Path)
+        self._zones = []
+        for zone_name, zone_config in self.config['zones'].items():
+            verts = np.array([(p['lon'], p['lat']) for p in zone_config['boundary']])
+            self._zones.append((zone_name, zone_config['zone_id'], verts, Path(verts)))
+        # closed boundary rings plus a pixel-polyline cache for the renderer
+        self._border_rings = [np.vstack([verts, verts[:1]]) for _, _, verts, _ in self._zones]
+        self._border_px = {}
+        self._zone_mask_cache = {}
+        # padded bounding box over every zone boundary, shared by the generators
+        all_verts = np.vstack([verts for _, _, verts, _ in self._zones])
+        self._lon_min, self._lat_min = all_verts.min(axis=0) - 0.001
+        self._lon_max, self._lat_max = all_verts.max(axis=0) + 0.001
+        # sensors flattened into parallel arrays, indexed by position via _s_id
+        flat = [(s['sensor_id'], s['lon'], s['lat'], zone_id)
+                for zone_id, sensors in self.config['sensors'].items() for s in sensors]
+        self._s_id = pd.Index([f[0] for f in flat])
+        self._s_lon = np.array([f[1] for f in flat], dtype=np.float64)
+        self._s_lat = np.array([f[2] for f in flat], dtype=np.float64)
+        self._s_zone = np.array([f[3] for f in flat], dtype=object)
+
+    def _points_in_any_zone(self, pts):
+        """One vectorized polygon test per zone over a flat (n, 2) point array"""
+        in_any = np.zeros(len(pts), dtype=bool)
+        if _points_in_poly is not None:
+            xs = np.ascontiguousarray(pts[:, 0])
+            ys = np.ascontiguousarray(pts[:, 1])
+            for _, _, verts, _ in self._zones:
+                in_any |= _points_in_poly(xs, ys, np.ascontiguousarray(verts[:, 0]),
+                                          np.ascontiguousarray(verts[:, 1]))
+            return in_any
+        for _, _, _, path in self._zones:
+            in_any |= path.contains_points(pts)
+        return in_any
+
+    def _zone_mask(self, grid_lon_2d, grid_lat_2d, factor=8):
+        """Boolean mask of grid points inside any zone. Purely geometric, so it
+        is memoized on the grid's bounds and shape and shared across dates and
+        data types; callers must treat the returned array as read-only"""
+        key = (float(grid_lon_2d[0, 0]), float(grid_lon_2d[0, -1]),
+               float(grid_lat_2d[0, 0]), float(grid_lat_2d[-1, 0]), grid_lon_2d.shape)
+        mask = self._zone_mask_cache.get(key)
+        if mask is None:
+            if len(self._zone_mask_cache) > 8:
+                self._zone_mask_cache.clear()
+            mask = self._compute_zone_mask(grid_lon_2d, grid_lat_2d, factor)
+            self._zone_mask_cache[key] = mask
+        return mask
+
+    def _compute_zone_mask(self, grid_lon_2d, grid_lat_2d, factor):
+        """Evaluate the zone mask exactly on a coarse grid, then refine only
+        the blocks straddling a boundary"""
+        rows, cols = grid_lon_2d.shape
+        if rows % factor or cols % factor or rows < 4 * factor:
+            pts = np.column_stack((grid_lon_2d.ravel(), grid_lat_2d.ravel()))
+            return self._points_in_any_zone(pts).reshape(rows, cols)
+
+        # coarse pass on block centers
+        half = factor // 2
+        coarse_lon = grid_lon_2d[half::factor, half::factor]
+        coarse_lat = grid_lat_2d[half::factor, half::factor]
+        coarse_pts = np.column_stack((coarse_lon.ravel(), coarse_lat.ravel()))
+        coarse = self._points_in_any_zone(coarse_pts).reshape(coarse_lon.shape)
+
+        # blocks whose 4-neighborhood disagrees sit on a boundary
+        edge = np.zeros_like(coarse)
+        edge[:-1, :] |= coarse[:-1, :] != coarse[1:, :]
+        edge[1:, :] |= coarse[1:, :] != coarse[:-1, :]
+        edge[:, :-1] |= coarse[:, :-1] != coarse[:, 1:]
+        edge[:, 1:] |= coarse[:, 1:] != coarse[:, :-1]
+
+        block = np.ones((factor, factor), dtype=bool)
+        mask = np.kron(coarse, block)
+        band = np.kron(edge, block)
+        if band.any():
+            band_pts = np.column_stack((grid_lon_2d[band], grid_lat_2d[band]))
+            mask[band] = self._points_in_any_zone(band_pts)
+        return mask
+
+    _UPSCALE = 4  # rendered pixels per grid cell
+
+    def _render_png(self, grid_values, mask, bounds, alpha=0.75, sensor_pts=None):
+        """Colormap the masked grid straight to RGBA and PNG-encode it with PIL,
+        skipping matplotlib's contour polygon generation and savefig rasterization"""
+        lon_min, lon_max, lat_min, lat_max = bounds
+        grid_values = np.asarray(grid_values, dtype=np.float32)
+        valid = mask & np.isfinite(grid_values)
+        if valid.any():
+            vmin = float(grid_values[valid].min())
+            vmax = float(grid_values[valid].max())
+        else:
+            vmin, vmax = 0.0, 1.0
+        if vmax - vmin < 0.01:  # widen flat range
+            vmin -= 0.5
+            vmax += 0.5
+
+        norm = np.clip((grid_values - np.float32(vmin)) / np.float32(vmax - vmin), 0, 1)
+        rgba = _LUT[(np.nan_to_num(norm) * 255).astype(np.uint8)]
+        rgba[..., 3] = np.where(valid, int(alpha * 255), 0)
+
+        # grid row 0 sits at lat_min; image row 0 sits at lat_max
+        img = Image.fromarray(np.flipud(rgba), 'RGBA')
+        width, height = img.width * self._UPSCALE, img.height * self._UPSCALE
+        img = img.resize((width, height), Image.BILINEAR)
+
+        draw = ImageDraw.Draw(img)
+        sx = (width - 1) / (lon_max - lon_min)
+        sy = (height - 1) / (lat_max - lat_min)
+
+        # zone borders: the projected polylines only change with bounds or size,
+        # which are constant for the prescription maps, so cache them
+        key = (bounds, width, height)
+        polylines = self._border_px.get(key)
+        if polylines is None:
+            if len(self._border_px) > 8:
+                self._border_px.clear()
+            polylines = [[((lon - lon_min) * sx, (lat_max - lat) * sy) for lon, lat in ring]
+                         for ring in self._border_rings]
+            self._border_px[key] = polylines
+        for line in polylines:
+            draw.line(line, fill=(255, 255, 255, 230), width=3)
+
+        # sensor markers
+        if sensor_pts is not None:
+            for lon, lat in zip(*sensor_pts):
+                x, y = (lon - lon_min) * sx, (lat_max - lat) * sy
+                draw.ellipse([x - 3, y - 3, x + 3, y + 3],
+                             fill=(255, 0, 0, 255), outline=(255, 255, 255, 255))
+
+        buf = io.BytesIO()
+        img.save(buf, 'PNG', compress_level=1, optimize=False)
+        return base64.b64encode(buf.getvalue()).decode('utf-8')
     
     def generate_contour_heatmap(self, date_str, data_type='ground_moisture', resolution=200):
         """Generate high-quality contour heatmap clipped to zone boundaries as base64 image"""
-        sensor_data = pd.read_csv('sensor_data.csv')
-        sensor_day = sensor_data[sensor_data['date'] == date_str]
-        
+        sensor_day = load_day('sensor_data.csv', date_str)
+
         if len(sensor_day) == 0:
             return None
         
-        # collect sensor points
-        sensor_points = []
-        
-        for zone_id, sensors in self.config['sensors'].items():
-            for sensor in sensors:
-                sensor_id = sensor['sensor_id']
-                sensor_reading = sensor_day[sensor_day['sensor_id'] == sensor_id]
-                if len(sensor_reading) > 0 and data_type in sensor_reading.columns:
-                    value = sensor_reading[data_type].values[0]
-                    sensor_points.append({
-                        'lon': sensor['lon'],
-                        'lat': sensor['lat'],
-                        'value': value,
-                        'zone_id': zone_id
-                    })
-        
-        if len(sensor_points) == 0:
+        # one indexed lookup per sensor instead of a frame scan per sensor
+        if data_type in sensor_day.columns:
+            readings = sensor_day.groupby('sensor_id', sort=False, observed=True)[data_type].first().to_dict()
+        else:
+            readings = {}
+
+        # slice the sensor arrays down to the ids present in today's readings
+        present = self._s_id.isin(readings)
+        if not present.any():
             return None
-        
-        # build interpolation arrays
-        lons = np.array([p['lon'] for p in sensor_points])
-        lats = np.array([p['lat'] for p in sensor_points])
-        values = np.array([p['value'] for p in sensor_points])
-        
-        # add boundary points for coverage
-        boundary_lons = []
-        boundary_lats = []
-        boundary_values = []
-        
-        for zone_name, zone_config in self.config['zones'].items():
-            boundary = zone_config['boundary']
-            zone_id = zone_config['zone_id']
-            
-            # average sensor values per zone
-            zone_sensor_values = [p['value'] for p in sensor_points if p['zone_id'] == zone_id]
-            if len(zone_sensor_values) > 0:
-                avg_zone_value = np.mean(zone_sensor_values)
-                
-                # add boundary vertices
-                for vertex in boundary:
-                    boundary_lons.append(vertex['lon'])
-                    boundary_lats.append(vertex['lat'])
-                    boundary_values.append(avg_zone_value)
-        
-        # merge sensors and boundaries
-        all_lons = np.concatenate([lons, boundary_lons])
-        all_lats = np.concatenate([lats, boundary_lats])
-        all_values = np.concatenate([values, boundary_values])
+        lons = self._s_lon[present]
+        lats = self._s_lat[present]
+        values = np.array([readings[sid] for sid in self._s_id[present]], dtype=np.float64)
+        sensor_zones = self._s_zone[present]
+
+        # merge sensors and boundary coverage points into preallocated arrays;
+        # the vertex counts are known from the config, so no list growth
+        n_sens = lons.size
+        total = n_sens + sum(len(verts) for _, _, verts, _ in self._zones)
+        all_lons = np.empty(total, dtype=np.float64)
+        all_lats = np.empty(total, dtype=np.float64)
+        all_values = np.empty(total, dtype=np.float64)
+        all_lons[:n_sens] = lons
+        all_lats[:n_sens] = lats
+        all_values[:n_sens] = values
+        end = n_sens
+        for _, zone_id, verts, _ in self._zones:
+            # boundary vertices carry the zone's average sensor value
+            zone_values = values[sensor_zones == zone_id]
+            if zone_values.size:
+                nxt = end + len(verts)
+                all_lons[end:nxt] = verts[:, 0]
+                all_lats[end:nxt] = verts[:, 1]
+                all_values[end:nxt] = zone_values.mean()
+                end = nxt
+        all_lons, all_lats, all_values = all_lons[:end], all_lats[:end], all_values[:end]
         
         # pad bounds for coverage
         lon_min, lon_max = np.min(all_lons) - 0.0005, np.max(all_lons) + 0.0005
         lat_min, lat_max = np.min(all_lats) - 0.0005, np.max(all_lats) + 0.0005
         
         # build grid
-        grid_lon = np.linspace(lon_min, lon_max, resolution)
-        grid_lat = np.linspace(lat_min, lat_max, resolution)
+        grid_lon = np.linspace(lon_min, lon_max, resolution, dtype=np.float32)
+        grid_lat = np.linspace(lat_min, lat_max, resolution, dtype=np.float32)
         grid_lon_2d, grid_lat_2d = np.meshgrid(grid_lon, grid_lat)
         
         # interpolate grid values
         points = np.column_stack((all_lons, all_lats))
         
-        # prefer linear interpolation
-        grid_values = griddata(points, all_values, (grid_lon_2d, grid_lat_2d), method='linear')
+        # prefer linear interpolation, on a cached triangulation
+        grid_values = LinearNDInterpolator(_triangulation(points), all_values)(grid_lon_2d, grid_lat_2d)
         
         # fill nan with nearest
         nan_mask = np.isnan(grid_values)
         if np.any(nan_mask):
-            grid_values_nearest = griddata(points, all_values, (grid_lon_2d, grid_lat_2d), method='nearest')
-            grid_values = np.where(nan_mask, grid_values_nearest, grid_values)
-        
-        # mask outside zones
-        mask = np.ones_like(grid_values, dtype=bool)
-        for i in range(resolution):
-            for j in range(resolution):
-                point_lon = grid_lon_2d[i, j]
-                point_lat = grid_lat_2d[i, j]
-                in_any_zone = False
-                
-                for zone_name, zone_config in self.config['zones'].items():
-                    boundary = zone_config['boundary']
-                    vertices = [(p['lon'], p['lat']) for p in boundary]
-                    path = Path(vertices)
-                    if path.contains_point((point_lon, point_lat)):
-                        in_any_zone = True
-                        break
-                
-                if not in_any_zone:
-                    mask[i, j] = False
-        
-        grid_values_masked = np.ma.masked_where(mask == False, grid_values)
-        
-        # build figure
-        fig, ax = plt.subplots(figsize=(12, 10), dpi=150)
-        fig.patch.set_alpha(0)
-        ax.set_facecolor('none')
-        
-        # custom color ramp
-        colors = ['#00ff00', '#88ff00', '#ffff00', '#ff8800', '#ff0000']
-        cmap = LinearSegmentedColormap.from_list('vineyard', colors, N=256)
-        
-        # draw filled contours
-        vmin = np.nanmin(grid_values_masked)
-        vmax = np.nanmax(grid_values_masked)
-        
-        if vmax - vmin < 0.01:  # widen flat range
-            vmin -= 0.5
-            vmax += 0.5
-        
-        levels = np.linspace(vmin, vmax, 30)
-        contourf = ax.contourf(grid_lon_2d, grid_lat_2d, grid_values_masked, 
-                               levels=levels, cmap=cmap, alpha=0.7, antialiased=True)
-        
-        # add contour lines
-        contour_lines = ax.contour(grid_lon_2d, grid_lat_2d, grid_values_masked, 
-                                   levels=np.linspace(vmin, vmax, 15), 
-                                   colors='black', alpha=0.15, linewidths=0.5, antialiased=True)
-        
-        # draw zone borders
-        for zone_name, zone_config in self.config['zones'].items():
-            boundary = zone_config['boundary']
-            boundary_lons = [p['lon'] for p in boundary] + [boundary[0]['lon']]
-            boundary_lats = [p['lat'] for p in boundary] + [boundary[0]['lat']]
-            ax.plot(boundary_lons, boundary_lats, 'white', linewidth=2.5, alpha=0.9, zorder=4)
-        
-        # draw sensor markers
-        ax.scatter(lons, lats, c='red', s=15, marker='o', 
-                  edgecolors='white', linewidths=0.8, zorder=5)
+            nearest = NearestNDInterpolator(points, all_values)
+            grid_values[nan_mask] = nearest(grid_lon_2d[nan_mask], grid_lat_2d[nan_mask])
         
-        ax.set_xlim(lon_min, lon_max)
-        ax.set_ylim(lat_min, lat_max)
-        ax.set_aspect('equal')
-        ax.axis('off')
-        
-        # encode as base64
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', 
-                   pad_inches=0, transparent=True, dpi=150)
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close(fig)
+        # mask outside zones and render
+        mask = self._zone_mask(grid_lon_2d, grid_lat_2d)
+        img_base64 = self._render_png(grid_values, mask, (lon_min, lon_max, lat_min, lat_max),
+                                      alpha=0.7, sensor_pts=(lons, lats))
         
         return {
             'image': img_base64,
@@ -184,9 +274,7 @@ class HeatmapGenerator:
         interp_values = []
         values = []
         
-        for zone_name, zone_config in self.config['zones'].items():
-            zone_id = zone_config['zone_id']
-            
+        for _, zone_id, verts, _ in self._zones:
             if prescription_type == 'water':
                 value = prescription_data.get(zone_id, 0)
             else:  # fertilizer
@@ -195,102 +283,37 @@ class HeatmapGenerator:
             
             if value > 0:
                 values.append(value)
-                boundary = zone_config['boundary']
-                zone_lons = [p['lon'] for p in boundary]
-                zone_lats = [p['lat'] for p in boundary]
-                center_lon = sum(zone_lons) / len(zone_lons)
-                center_lat = sum(zone_lats) / len(zone_lats)
                 
                 # add center point and edges
-                interp_lons.append(center_lon)
-                interp_lats.append(center_lat)
+                interp_lons.append(verts[:, 0].mean())
+                interp_lats.append(verts[:, 1].mean())
                 interp_values.append(value)
                 
                 # add boundary points
-                for p in boundary:
-                    interp_lons.append(p['lon'])
-                    interp_lats.append(p['lat'])
-                    interp_values.append(value)
+                interp_lons.extend(verts[:, 0])
+                interp_lats.extend(verts[:, 1])
+                interp_values.extend([value] * len(verts))
         
         if len(values) == 0:
             return None
         
-        # build bounds
-        all_lons = [p['lon'] for zone_config in self.config['zones'].values() for p in zone_config['boundary']]
-        all_lats = [p['lat'] for zone_config in self.config['zones'].values() for p in zone_config['boundary']]
-        lon_min, lon_max = min(all_lons) - 0.001, max(all_lons) + 0.001
-        lat_min, lat_max = min(all_lats) - 0.001, max(all_lats) + 0.001
+        # static bounds precomputed from the zone boundaries
+        lon_min, lon_max = self._lon_min, self._lon_max
+        lat_min, lat_max = self._lat_min, self._lat_max
         
         # create grid
-        grid_lon = np.linspace(lon_min, lon_max, resolution)
-        grid_lat = np.linspace(lat_min, lat_max, resolution)
+        grid_lon = np.linspace(lon_min, lon_max, resolution, dtype=np.float32)
+        grid_lat = np.linspace(lat_min, lat_max, resolution, dtype=np.float32)
         grid_lon_2d, grid_lat_2d = np.meshgrid(grid_lon, grid_lat)
         
-        # interpolate grid
+        # interpolate grid; CloughTocher is what griddata's cubic mode runs underneath
         points = np.column_stack((interp_lons, interp_lats))
-        grid_values = griddata(points, interp_values, (grid_lon_2d, grid_lat_2d), method='cubic')
-        
-        # mask outside zones
-        mask = np.ones_like(grid_values, dtype=bool)
-        for i in range(resolution):
-            for j in range(resolution):
-                point_lon = grid_lon_2d[i, j]
-                point_lat = grid_lat_2d[i, j]
-                in_any_zone = False
-                
-                for zone_name, zone_config in self.config['zones'].items():
-                    boundary = zone_config['boundary']
-                    vertices = [(p['lon'], p['lat']) for p in boundary]
-                    path = Path(vertices)
-                    if path.contains_point((point_lon, point_lat)):
-                        in_any_zone = True
-                        break
-                
-                if not in_any_zone:
-                    mask[i, j] = False
-        
-        grid_values_masked = np.ma.masked_where(mask == False, grid_values)
-        
-        # build figure
-        fig, ax = plt.subplots(figsize=(12, 10), dpi=150)
-        fig.patch.set_alpha(0)
-        ax.set_facecolor('none')
-        
-        # custom color ramp
-        colors = ['#00ff00', '#88ff00', '#ffff00', '#ff8800', '#ff0000']
-        cmap = LinearSegmentedColormap.from_list('prescription', colors, N=256)
-        
-        # draw filled contours
-        vmin = np.nanmin(grid_values_masked)
-        vmax = np.nanmax(grid_values_masked)
+        grid_values = CloughTocher2DInterpolator(_triangulation(points),
+                                                 np.asarray(interp_values))(grid_lon_2d, grid_lat_2d)
         
-        if vmax - vmin < 0.01:
-            vmin -= 0.5
-            vmax += 0.5
-        
-        levels = np.linspace(vmin, vmax, 25)
-        contourf = ax.contourf(grid_lon_2d, grid_lat_2d, grid_values_masked, 
-                               levels=levels, cmap=cmap, alpha=0.75, antialiased=True)
-        
-        # draw zone borders
-        for zone_name, zone_config in self.config['zones'].items():
-            boundary = zone_config['boundary']
-            boundary_lons = [p['lon'] for p in boundary] + [boundary[0]['lon']]
-            boundary_lats = [p['lat'] for p in boundary] + [boundary[0]['lat']]
-            ax.plot(boundary_lons, boundary_lats, 'white', linewidth=2.5, alpha=0.9, zorder=4)
-        
-        ax.set_xlim(lon_min, lon_max)
-        ax.set_ylim(lat_min, lat_max)
-        ax.set_aspect('equal')
-        ax.axis('off')
-        
-        # encode as base64
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', 
-                   pad_inches=0, transparent=True, dpi=150)
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close(fig)
+        # mask outside zones and render
+        mask = self._zone_mask(grid_lon_2d, grid_lat_2d)
+        img_base64 = self._render_png(grid_values, mask, (lon_min, lon_max, lat_min, lat_max))
         
         return {
             'image': img_base64,
@@ -305,156 +328,61 @@ class HeatmapGenerator:
         if not sensor_prescription_data:
             return None
         
-        # gather sensor coordinates
-        interp_lons = []
-        interp_lats = []
-        interp_values = []
-        
-        for sensor_id, sensor_needs in sensor_prescription_data.items():
-            # find sensor location
-            sensor_config = None
-            for zone_config in self.config['sensors'].values():
-                for sensor in zone_config:
-                    if sensor['sensor_id'] == sensor_id:
-                        sensor_config = sensor
-                        break
-                if sensor_config:
-                    break
-            
-            if sensor_config:
-                if prescription_type == 'water':
-                    value = sensor_needs.get('water_mm', 0)
-                else:  # fertilizer uses n value
-                    value = sensor_needs.get('N', 0)
-                
-                interp_lons.append(sensor_config['lon'])
-                interp_lats.append(sensor_config['lat'])
-                interp_values.append(value)
-        
-        if len(interp_values) == 0:
+        # resolve the prescription dict into flat arrays once
+        value_key = 'water_mm' if prescription_type == 'water' else 'N'
+        ids = list(sensor_prescription_data)
+        needs_values = np.array([sensor_prescription_data[sid].get(value_key, 0) for sid in ids],
+                                dtype=np.float64)
+        needs_zones = np.array([sensor_prescription_data[sid].get('zone_id') for sid in ids],
+                               dtype=object)
+        rows = self._s_id.get_indexer(ids)
+        known = rows >= 0
+        if not known.any():
             return None
-        
+        interp_lons = [self._s_lon[rows[known]]]
+        interp_lats = [self._s_lat[rows[known]]]
+        interp_values = [needs_values[known]]
+
         # add zone boundaries with averages
-        for zone_name, zone_config in self.config['zones'].items():
-            zone_id = zone_config['zone_id']
-            # compute zone average
-            zone_sensor_values = []
-            for sensor_id, sensor_needs in sensor_prescription_data.items():
-                if sensor_needs.get('zone_id') == zone_id:
-                    if prescription_type == 'water':
-                        zone_sensor_values.append(sensor_needs.get('water_mm', 0))
-                    else:
-                        zone_sensor_values.append(sensor_needs.get('N', 0))
-            
-            if zone_sensor_values:
-                avg_value = sum(zone_sensor_values) / len(zone_sensor_values)
-                for point in zone_config['boundary']:
-                    interp_lons.append(point['lon'])
-                    interp_lats.append(point['lat'])
-                    interp_values.append(avg_value)
+        for _, zone_id, verts, _ in self._zones:
+            zone_values = needs_values[needs_zones == zone_id]
+            if zone_values.size:
+                interp_lons.append(verts[:, 0])
+                interp_lats.append(verts[:, 1])
+                interp_values.append(np.full(len(verts), zone_values.mean()))
+        interp_lons = np.concatenate(interp_lons)
+        interp_lats = np.concatenate(interp_lats)
+        interp_values = np.concatenate(interp_values)
 
-        # build bounds
-        all_lons = [p['lon'] for zone_config in self.config['zones'].values() for p in zone_config['boundary']]
-        all_lats = [p['lat'] for zone_config in self.config['zones'].values() for p in zone_config['boundary']]
-        lon_min, lon_max = min(all_lons) - 0.001, max(all_lons) + 0.001
-        lat_min, lat_max = min(all_lats) - 0.001, max(all_lats) + 0.001
+        # static bounds precomputed from the zone boundaries
+        lon_min, lon_max = self._lon_min, self._lon_max
+        lat_min, lat_max = self._lat_min, self._lat_max
         
         # create grid
-        grid_lon = np.linspace(lon_min, lon_max, resolution)
-        grid_lat = np.linspace(lat_min, lat_max, resolution)
+        grid_lon = np.linspace(lon_min, lon_max, resolution, dtype=np.float32)
+        grid_lat = np.linspace(lat_min, lat_max, resolution, dtype=np.float32)
         grid_lon_2d, grid_lat_2d = np.meshgrid(grid_lon, grid_lat)
         
-        # interpolate values
+        # interpolate values, on a cached triangulation
         points = np.column_stack((interp_lons, interp_lats))
-        grid_values = griddata(points, interp_values, (grid_lon_2d, grid_lat_2d), method='linear')
+        grid_values = LinearNDInterpolator(_triangulation(points), interp_values)(grid_lon_2d, grid_lat_2d)
         
         # fill nan with nearest
         nan_mask = np.isnan(grid_values)
         if np.any(nan_mask):
-            grid_values_nearest = griddata(points, interp_values, (grid_lon_2d, grid_lat_2d), method='nearest')
-            grid_values[nan_mask] = grid_values_nearest[nan_mask]
-        
-        # mask outside zones
-        mask = np.ones_like(grid_values, dtype=bool)
-        for i in range(resolution):
-            for j in range(resolution):
-                point_lon = grid_lon_2d[i, j]
-                point_lat = grid_lat_2d[i, j]
-                in_any_zone = False
-                
-                for zone_name, zone_config in self.config['zones'].items():
-                    boundary = zone_config['boundary']
-                    vertices = [(p['lon'], p['lat']) for p in boundary]
-                    path = Path(vertices)
-                    if path.contains_point((point_lon, point_lat)):
-                        in_any_zone = True
-                        break
-                
-                if not in_any_zone:
-                    mask[i, j] = False
-        
-        grid_values_masked = np.ma.masked_where(mask == False, grid_values)
-        
-        # build figure
-        fig, ax = plt.subplots(figsize=(12, 10), dpi=150)
-        fig.patch.set_alpha(0)
-        ax.set_facecolor('none')
-        
-        # custom color ramp
-        colors = ['#00ff00', '#88ff00', '#ffff00', '#ff8800', '#ff0000']
-        cmap = LinearSegmentedColormap.from_list('prescription', colors, N=256)
+            nearest = NearestNDInterpolator(points, interp_values)
+            grid_values[nan_mask] = nearest(grid_lon_2d[nan_mask], grid_lat_2d[nan_mask])
         
-        # draw filled contours
-        vmin = np.nanmin(grid_values_masked)
-        vmax = np.nanmax(grid_values_masked)
-        
-        if vmax - vmin < 0.01:
-            vmin -= 0.5
-            vmax += 0.5
-        
-        levels = np.linspace(vmin, vmax, 30)
-        contourf = ax.contourf(grid_lon_2d, grid_lat_2d, grid_values_masked, 
-                               levels=levels, cmap=cmap, alpha=0.75, antialiased=True)
-        
-        # add contour lines
-        contour = ax.contour(grid_lon_2d, grid_lat_2d, grid_values_masked,
-                            levels=15, colors='white', linewidths=0.5, alpha=0.3)
-        
-        # draw sensor markers
-        sensor_lons = []
-        sensor_lats = []
-        for zone_config in self.config['sensors'].values():
-            for sensor in zone_config:
-                sensor_lons.append(sensor['lon'])
-                sensor_lats.append(sensor['lat'])
-        
-        ax.scatter(sensor_lons, sensor_lats, c='red', s=15, alpha=0.8, zorder=5, edgecolors='white', linewidths=0.5)
-        
-        # draw zone borders
-        for zone_name, zone_config in self.config['zones'].items():
-            boundary = zone_config['boundary']
-            boundary_lons = [p['lon'] for p in boundary] + [boundary[0]['lon']]
-            boundary_lats = [p['lat'] for p in boundary] + [boundary[0]['lat']]
-            ax.plot(boundary_lons, boundary_lats, 'white', linewidth=2.5, alpha=0.9, zorder=4)
-        
-        ax.set_xlim(lon_min, lon_max)
-        ax.set_ylim(lat_min, lat_max)
-        ax.set_aspect('equal')
-        ax.axis('off')
-        
-        # encode as base64
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', 
-                   pad_inches=0, transparent=True, dpi=150)
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close(fig)
+        # mask outside zones and render with all sensor positions marked
+        mask = self._zone_mask(grid_lon_2d, grid_lat_2d)
+        img_base64 = self._render_png(grid_values, mask, (lon_min, lon_max, lat_min, lat_max),
+                                      sensor_pts=(self._s_lon, self._s_lat))
         
         return {
             'image': img_base64,
             'bounds': [[lat_min, lon_min], [lat_max, lon_max]],
-            'min_value': float(min(interp_values)),
-            'max_value': float(max(interp_values)),
+            'min_value': float(interp_values.min()),
+            'max_value': float(interp_values.max()),
             'prescription_type': prescription_type
         }
 
@@ -1,13 +1,51 @@
 import json
 import numpy as np
 import pandas as pd
-from math import radians, sin, cos, sqrt, atan2
+from scipy.spatial import cKDTree
+from data_cache import load_day
+
+try:
+    from numba import njit, prange
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _idw_kernel(lon_g, lat_g, lon_s, lat_s, val_s, rad_s, eps, mx, my, fill):
+        """Fused planar-distance IDW: no pairwise temporaries, one pass per point"""
+        out = np.empty(lon_g.shape[0])
+        for i in prange(lon_g.shape[0]):
+            w_sum = 0.0
+            wv_sum = 0.0
+            for j in range(lon_s.shape[0]):
+                dx = (lon_g[i] - lon_s[j]) * mx
+                dy = (lat_g[i] - lat_s[j]) * my
+                d2 = dx * dx + dy * dy
+                if d2 <= rad_s[j] * rad_s[j]:
+                    w = 1.0 / (d2 + eps)
+                    w_sum += w
+                    wv_sum += w * val_s[j]
+            out[i] = wv_sum / w_sum if w_sum > 0.0 else fill
+        return out
+except ImportError:  # numpy paths below cover the no-numba case
+    _idw_kernel = None
+from math import radians, sin, cos, sqrt, atan2, pi
 
 class SpatialInterpolator:
     def __init__(self, config_path='vineyard_config.json'):
         with open(config_path, 'r') as f:
             self.config = json.load(f)
         self.epsilon = 1e-10
+        # flatten the sensor config into parallel arrays once; hot paths index
+        # these instead of re-walking the dict-of-lists-of-dicts every call
+        flat = [(s['sensor_id'], s['lon'], s['lat'], s['radius_m'])
+                for sensors in self.config['sensors'].values() for s in sensors]
+        self._s_id = pd.Index([f[0] for f in flat])
+        self._s_lon = np.array([f[1] for f in flat], dtype=np.float64)
+        self._s_lat = np.array([f[2] for f in flat], dtype=np.float64)
+        self._s_radius = np.array([f[3] for f in flat], dtype=np.float64)
+        # planar projection scale around the vineyard's mean latitude
+        lat0_rad = radians(self._s_lat.mean()) if len(self._s_lat) else 0.0
+        R = 6371000  # earth radius meters
+        self._mx = R * cos(lat0_rad) * pi / 180  # meters per degree of longitude
+        self._my = R * pi / 180                  # meters per degree of latitude
     
     def haversine_distance(self, lon1, lat1, lon2, lat2):
         """Calculate distance in meters between two coordinates"""
@@ -18,93 +56,170 @@ class SpatialInterpolator:
         a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
         return 2 * R * atan2(sqrt(a), sqrt(1-a))
     
-    def interpolate_value(self, lon, lat, sensor_data, data_col, baseline_value=None):
-        """Interpolate value at (lon, lat) using inverse distance weighting"""
-        weights = []
-        values = []
+    def _haversine_matrix(self, lon_g, lat_g, lon_s, lat_s):
+        """Pairwise (points x sensors) haversine distances in meters"""
+        R = 6371000  # earth radius meters
+        lon_g, lat_g = np.radians(lon_g), np.radians(lat_g)
+        lon_s, lat_s = np.radians(lon_s), np.radians(lat_s)
+        dlat = lat_g[:, None] - lat_s[None, :]
+        dlon = lon_g[:, None] - lon_s[None, :]
+        a = np.sin(dlat / 2)**2 + np.cos(lat_g)[:, None] * np.cos(lat_s)[None, :] * np.sin(dlon / 2)**2
+        return 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    def _distance_matrix(self, lon_g, lat_g, lon_s, lat_s):
+        """Pairwise (points x sensors) distances in meters. The equirectangular
+        approximation is sub-mm accurate at vineyard extents; fall back to
+        haversine if the latitude span ever exceeds ~0.57 degrees"""
+        if max(lat_g.max(), lat_s.max()) - min(lat_g.min(), lat_s.min()) > 0.57:
+            return self._haversine_matrix(lon_g, lat_g, lon_s, lat_s)
+        dx = (lon_g[:, None] - lon_s[None, :]) * self._mx
+        dy = (lat_g[:, None] - lat_s[None, :]) * self._my
+        return np.sqrt(dx * dx + dy * dy)
+
+    def _idw_weights(self, lon_g, lat_g, present):
+        """Row-normalized (points x sensors) IDW weight matrix for the sensors
+        selected by the boolean mask, with the per-sensor radius applied.
+        Rows outside every sensor's radius stay all-zero; the second return
+        value marks the covered rows"""
+        lon_s, lat_s = self._s_lon[present], self._s_lat[present]
+        rad_s = self._s_radius[present]
+        dist = self._distance_matrix(lon_g, lat_g, lon_s, lat_s)
+        weights = np.where(dist <= rad_s[None, :], 1.0 / (dist * dist + self.epsilon), 0.0)
+        weight_sum = weights.sum(axis=1)
+        covered = weight_sum > 0
+        weights[covered] /= weight_sum[covered, None]
+        return weights, covered
+
+    def _idw(self, lon_g, lat_g, sensor_values, baseline_value=None):
+        """Inverse distance weighting for flat point arrays, all points at once"""
+        fill = float(baseline_value) if baseline_value is not None else 0.0
+        lon_g, lat_g = np.asarray(lon_g), np.asarray(lat_g)
+        present = self._s_id.isin(sensor_values)
+        if not present.any():
+            return np.full(lon_g.size, fill)
+        lon_s, lat_s = self._s_lon[present], self._s_lat[present]
+        rad_s = self._s_radius[present]
+        val_s = np.array([sensor_values[sid] for sid in self._s_id[present]], dtype=np.float64)
+
+        # the fused jit kernel wins whenever the planar approximation holds
+        if _idw_kernel is not None and lat_g.max() - lat_g.min() <= 0.57:
+            return _idw_kernel(np.ascontiguousarray(lon_g, dtype=np.float64),
+                               np.ascontiguousarray(lat_g, dtype=np.float64),
+                               lon_s.astype(np.float64), lat_s.astype(np.float64),
+                               val_s, rad_s, self.epsilon, self._mx, self._my, fill)
+
+        # big grids go through the kd-tree shortlist to avoid the dense pair matrix
+        if lon_g.size * lon_s.size > 250_000:
+            return self._idw_sparse(lon_g, lat_g, lon_s, lat_s, rad_s, val_s, fill)
+
+        weights, covered = self._idw_weights(lon_g, lat_g, present)
+        out = np.full(lon_g.size, fill)
+        out[covered] = (weights @ val_s)[covered]
+        return out
+
+    def _idw_sparse(self, lon_g, lat_g, lon_s, lat_s, rad_s, val_s, fill):
+        """IDW touching only the (point, sensor) pairs a kd-tree says are in range"""
+        pts = np.column_stack((lon_g * self._mx, lat_g * self._my))
+        tree = cKDTree(np.column_stack((lon_s * self._mx, lat_s * self._my)))
+        pairs = tree.query_ball_point(pts, r=float(rad_s.max()))
+        rows = np.fromiter((i for i, nbrs in enumerate(pairs) for _ in nbrs), dtype=np.int64)
+        cols = np.fromiter((j for nbrs in pairs for j in nbrs), dtype=np.int64)
         
-        for zone_id, sensors in self.config['sensors'].items():
-            for sensor in sensors:
-                sensor_id = sensor['sensor_id']
-                sensor_lon, sensor_lat = sensor['lon'], sensor['lat']
-                radius = sensor['radius_m']
-                
-                dist = self.haversine_distance(lon, lat, sensor_lon, sensor_lat)
-                
-                if dist <= radius:
-                    weight = 1.0 / (dist**2 + self.epsilon)
-                    sensor_value = sensor_data[sensor_data['sensor_id'] == sensor_id][data_col].values
-                    if len(sensor_value) > 0:
-                        weights.append(weight)
-                        values.append(sensor_value[0])
+        out = np.full(lon_g.size, fill)
+        if not len(rows):
+            return out
+        # exact per-sensor radius filter on the shortlisted pairs
+        dx = (lon_g[rows] - lon_s[cols]) * self._mx
+        dy = (lat_g[rows] - lat_s[cols]) * self._my
+        d2 = dx * dx + dy * dy
+        keep = d2 <= rad_s[cols] ** 2
+        rows, cols, d2 = rows[keep], cols[keep], d2[keep]
         
-        if len(weights) > 0:
-            total_weight = sum(weights)
-            interpolated = sum(w * v for w, v in zip(weights, values)) / total_weight
-            return interpolated
-        elif baseline_value is not None:
-            return baseline_value
-        else:
-            return 0
+        w = 1.0 / (d2 + self.epsilon)
+        weight_sum = np.bincount(rows, weights=w, minlength=lon_g.size)
+        weighted_vals = np.bincount(rows, weights=w * val_s[cols], minlength=lon_g.size)
+        covered = weight_sum > 0
+        out[covered] = weighted_vals[covered] / weight_sum[covered]
+        return out
+
+    def interpolate_value(self, lon, lat, sensor_values, baseline_value=None):
+        """Interpolate value at (lon, lat) with inverse distance weighting over a
+        precomputed sensor_id -> value dict"""
+        return float(self._idw(np.array([lon]), np.array([lat]), sensor_values, baseline_value)[0])
     
     def generate_heatmap(self, sensor_data, data_col, resolution=20, baseline=None):
         """Generate heatmap grid for visualization"""
-        all_lons = [s['lon'] for sensors in self.config['sensors'].values() for s in sensors]
-        all_lats = [s['lat'] for sensors in self.config['sensors'].values() for s in sensors]
-        
-        min_lon, max_lon = min(all_lons) - 0.001, max(all_lons) + 0.001
-        min_lat, max_lat = min(all_lats) - 0.001, max(all_lats) + 0.001
+        min_lon, max_lon = self._s_lon.min() - 0.001, self._s_lon.max() + 0.001
+        min_lat, max_lat = self._s_lat.min() - 0.001, self._s_lat.max() + 0.001
         
         lons = np.linspace(min_lon, max_lon, resolution)
         lats = np.linspace(min_lat, max_lat, resolution)
         
-        grid = []
-        for lat in lats:
-            row = []
-            for lon in lons:
-                value = self.interpolate_value(lon, lat, sensor_data, data_col, baseline)
-                row.append(value)
-            grid.append(row)
+        # resolve each sensor's reading once, then interpolate the whole grid in one call
+        sensor_values = sensor_data.groupby('sensor_id', sort=False, observed=True)[data_col].first().to_dict()
+        grid_lon, grid_lat = np.meshgrid(lons, lats)
+        grid = self._idw(grid_lon.ravel(), grid_lat.ravel(), sensor_values, baseline)
+        grid = grid.reshape(resolution, resolution)
         
         return {
             'lons': lons.tolist(),
             'lats': lats.tolist(),
-            'values': grid,
-            'min': float(np.min(grid)),
-            'max': float(np.max(grid))
+            'values': grid.tolist(),
+            'min': float(grid.min()),
+            'max': float(grid.max())
         }
     
-    def generate_all_heatmaps(self, date_str):
+    _HEATMAP_FIELDS = ('ground_moisture', 'temperature', 'humidity', 'pH',
+                       'nutrient_N', 'nutrient_P', 'nutrient_K')
+
+    def generate_all_heatmaps(self, date_str, resolution=20):
         """Generate all heatmap layers for a specific date"""
-        sensor_data = pd.read_csv('sensor_data.csv')
-        weather_data = pd.read_csv('weather_data.csv')
-        plant_data = pd.read_csv('plant_data.csv')
-        
-        sensor_day = sensor_data[sensor_data['date'] == date_str]
-        weather_day = weather_data[weather_data['date'] == date_str]
-        plant_day = plant_data[plant_data['date'] == date_str]
-        
+        sensor_day = load_day('sensor_data.csv', date_str)
+        weather_day = load_day('weather_data.csv', date_str)
+        plant_day = load_day('plant_data.csv', date_str)
+
         baseline_temp = weather_day['temperature'].values[0] if len(weather_day) > 0 else 20
-        baseline_rain = weather_day['rainfall'].values[0] if len(weather_day) > 0 else 0
-        
-        heatmaps = {
-            'date': date_str,
-            'ground_moisture': self.generate_heatmap(sensor_day, 'ground_moisture'),
-            'temperature': self.generate_heatmap(sensor_day, 'temperature', baseline_temp),
-            'humidity': self.generate_heatmap(sensor_day, 'humidity', weather_day['humidity'].values[0] if len(weather_day) > 0 else 60),
-            'pH': self.generate_heatmap(sensor_day, 'pH'),
-            'nutrient_N': self.generate_heatmap(sensor_day, 'nutrient_N'),
-            'nutrient_P': self.generate_heatmap(sensor_day, 'nutrient_P'),
-            'nutrient_K': self.generate_heatmap(sensor_day, 'nutrient_K'),
-            'rainfall': baseline_rain
+        # cast to a plain float: the cached loader yields float32, which the
+        # stdlib json encoder rejects
+        baseline_rain = float(weather_day['rainfall'].values[0]) if len(weather_day) > 0 else 0.0
+        baselines = {
+            'temperature': baseline_temp,
+            'humidity': weather_day['humidity'].values[0] if len(weather_day) > 0 else 60,
         }
-        
+
+        min_lon, max_lon = self._s_lon.min() - 0.001, self._s_lon.max() + 0.001
+        min_lat, max_lat = self._s_lat.min() - 0.001, self._s_lat.max() + 0.001
+        lons = np.linspace(min_lon, max_lon, resolution)
+        lats = np.linspace(min_lat, max_lat, resolution)
+        grid_lon, grid_lat = np.meshgrid(lons, lats)
+
+        # every field shares the same sensor set and grid, so the radius-filtered
+        # normalized weight matrix is built once and each layer is one matmul
+        readings = sensor_day.groupby('sensor_id', sort=False, observed=True)[
+            list(self._HEATMAP_FIELDS)].first()
+        present = self._s_id.isin(readings.index)
+        if present.any():
+            weights, covered = self._idw_weights(grid_lon.ravel(), grid_lat.ravel(), present)
+            vals = readings.reindex(self._s_id[present]).to_numpy(dtype=np.float64)
+
+        heatmaps = {'date': date_str}
+        for col, field in enumerate(self._HEATMAP_FIELDS):
+            grid = np.full(grid_lon.size, float(baselines.get(field, 0.0)))
+            if present.any():
+                grid[covered] = (weights @ vals[:, col])[covered]
+            grid = grid.reshape(resolution, resolution)
+            heatmaps[field] = {
+                'lons': lons.tolist(),
+                'lats': lats.tolist(),
+                'values': grid.tolist(),
+                'min': float(grid.min()),
+                'max': float(grid.max())
+            }
+        heatmaps['rainfall'] = baseline_rain
+
         # add zone health
-        zone_health = {}
-        for _, row in plant_day.iterrows():
-            zone_health[row['zone_id']] = row['health_index']
-        heatmaps['zone_health'] = zone_health
-        
+        heatmaps['zone_health'] = dict(zip(plant_day['zone_id'], plant_day['health_index']))
+
         return heatmaps
 
 if __name__ == '__main__':